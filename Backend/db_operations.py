@@ -1,5 +1,38 @@
+"""
+Database operations for the djongo backend (Backend/djongo_backend).
+
+djongo translates every statement Django's SQL compiler produces by parsing it
+with sqlparse, and the parse is the bulk of that translation's cost. Django
+emits the same few statement shapes over and over (an Attendance filter by
+employee and date, get_or_create, the employee list), and djongo rewrites each
+%s placeholder to a numbered %(n)s before parsing, so a statement's text never
+contains its parameters. TranslationCache memoizes the parse per statement
+template in a bounded LRU; djongo then builds the Mongo query from the cached
+tree and binds that call's parameters as usual.
+
+djongo cannot translate EXTRACT or date truncation, so a `date__month` filter
+cannot run and a computed $year/$month could not use an index anyway.
+DateRangeQuerySet rewrites exact year, year+month and year+month+day lookups on
+date and datetime fields into half-open `__gte`/`__lt` ranges before Django
+compiles them, so the (date, ...) indexes serve every such filter without
+changes at the call sites. Every Home model with a date field uses it as its
+manager's queryset, so the rewrite also covers Q objects, related managers and
+subqueries built from them. A month or day without a year has no range and
+still fails, with NotSupportedError from CustomDatabaseOperations.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import sqlparse
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import NotSupportedError, models
 from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Q
+from django.utils import timezone
 from djongo.operations import DatabaseOperations
+from djongo.sql2mongo import converters as sql_converters, query as sql_query
 
 class DjongoDateOperations(BaseDatabaseOperations):
     def datetime_trunc_sql(self, lookup_type, field_name, tzname=None):
@@ -12,18 +45,213 @@ class DjongoDateOperations(BaseDatabaseOperations):
             return f"datetime(year({field_name}), month({field_name}), day({field_name}))", []
         return field_name, []
 
+
+class TranslationCache:
+    """
+    Bounded LRU of parsed SQL statements, keyed by statement template.
+
+    The cached trees are shared between threads; djongo only reads them while
+    building a query. maxsize 0 disables caching.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def parse(self, sql, *args, **kwargs):
+        if self.maxsize <= 0 or args or kwargs:
+            return sqlparse.parse(sql, *args, **kwargs)
+        with self._lock:
+            statements = self._entries.get(sql)
+            if statements is not None:
+                self._entries.move_to_end(sql)
+                self.hits += 1
+                return statements
+            self.misses += 1
+
+        # Parse outside the lock; two threads missing on the same template both parse it
+        statements = tuple(sqlparse.parse(sql))
+        with self._lock:
+            self._entries[sql] = statements
+            self._entries.move_to_end(sql)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return statements
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Size, hits, misses, evictions and hit rate since start (or the last clear())."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.maxsize > 0,
+                'maxsize': self.maxsize,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+translation_cache = TranslationCache(getattr(settings, 'DJONGO_TRANSLATION_CACHE_SIZE', 512))
+
+
+def install_translation_cache():
+    """Route djongo's statement (and subquery) parsing through translation_cache. Idempotent."""
+    sql_query.sqlparse = translation_cache.parse
+    sql_converters.sqlparse = translation_cache.parse
+
+
+def uninstall_translation_cache():
+    """Restore djongo's uncached parsing."""
+    sql_query.sqlparse = sqlparse.parse
+    sql_converters.sqlparse = sqlparse.parse
+
+
+DATE_PARTS = ('year', 'month', 'day')
+
+
+def _date_field(model, path):
+    """The Date/DateTimeField at the end of a lookup path like 'date' or 'employee__date_joined', or None."""
+    field = None
+    for name in path.split('__'):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model if field.is_relation else None
+    return field if isinstance(field, models.DateField) else None
+
+
+def _part_value(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def date_bounds(field, year, month=None, day=None):
+    """
+    Half-open [start, end) covering a year, month or day. Datetime bounds are in
+    the current time zone, as Django's own __year/__month lookups are.
+    """
+    if day is not None:
+        start = date(year, month, day)
+        end = start + timedelta(days=1)
+    elif month is not None:
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    else:
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    if isinstance(field, models.DateTimeField):
+        start, end = datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day)
+        if settings.USE_TZ:
+            zone = timezone.get_current_timezone()
+            start, end = timezone.make_aware(start, zone), timezone.make_aware(end, zone)
+    return start, end
+
+
+def rewrite_date_lookups(model, lookups):
+    """
+    Replace exact year / year+month / year+month+day lookups in a {lookup: value}
+    dict with `__gte`/`__lt` bounds. Anything else (a month without a year,
+    expressions, an invalid date, a path that already has bounds) is left as is.
+    """
+    parts = {}
+    for lookup, value in lookups.items():
+        if lookup.endswith('__exact'):
+            lookup_path = lookup[:-len('__exact')]
+        else:
+            lookup_path = lookup
+        path, _, part = lookup_path.rpartition('__')
+        if part in DATE_PARTS and path:
+            parts.setdefault(path, {})[part] = (lookup, value)
+
+    rewritten = dict(lookups)
+    for path, found in parts.items():
+        values = {part: _part_value(value) for part, (_, value) in found.items()}
+        if None in values.values() or 'year' not in values or ('day' in values and 'month' not in values):
+            continue
+        if f'{path}__gte' in lookups or f'{path}__lt' in lookups:
+            continue
+        field = _date_field(model, path)
+        if field is None:
+            continue
+        try:
+            start, end = date_bounds(field, values['year'], values.get('month'), values.get('day'))
+        except ValueError:
+            # e.g. month=13; left to Django
+            continue
+        for lookup, _ in found.values():
+            del rewritten[lookup]
+        rewritten[f'{path}__gte'] = start
+        rewritten[f'{path}__lt'] = end
+    return rewritten
+
+
+def rewrite_date_q(model, q):
+    """rewrite_date_lookups() applied to every AND group of lookups in a Q tree."""
+    children = [rewrite_date_q(model, child) if isinstance(child, Q) else child for child in q.children]
+    lookups = [child for child in children if isinstance(child, tuple)]
+    if q.connector == Q.AND and len({lookup for lookup, _ in lookups}) == len(lookups):
+        others = [child for child in children if not isinstance(child, tuple)]
+        children = others + list(rewrite_date_lookups(model, dict(lookups)).items())
+    return Q(*children, _connector=q.connector, _negated=q.negated)
+
+
+class DateRangeQuerySet(models.QuerySet):
+    """
+    QuerySet whose filter()/exclude()/get() (and everything built on them)
+    turn exact year/month/day lookups into index-friendly date ranges.
+    """
+
+    def _filter_or_exclude_inplace(self, negate, args, kwargs):
+        args = tuple(rewrite_date_q(self.model, arg) if isinstance(arg, Q) else arg for arg in args)
+        super()._filter_or_exclude_inplace(negate, args, rewrite_date_lookups(self.model, kwargs))
+
+
+DateRangeManager = models.Manager.from_queryset(DateRangeQuerySet)
+
+
 class CustomDatabaseOperations(DatabaseOperations):
-    def datetime_trunc_sql(self, lookup_type, field_name, tzname=None):
-        field_name = f'"{field_name}"'
-        trunc_mapping = {
-            'year': {'$year': field_name},
-            'month': {'$month': field_name},
-            'day': {'$dayOfMonth': field_name},
-            'hour': {'$hour': field_name},
-            'minute': {'$minute': field_name}
-        }
-        return trunc_mapping.get(lookup_type, field_name), []
+    def __init__(self, connection):
+        super().__init__(connection)
+        install_translation_cache()
+
+    def _unsupported(self, what, lookup_type):
+        raise NotSupportedError(
+            f"djongo cannot translate {what}('{lookup_type}'). Filter with a date range "
+            f"(DateRangeQuerySet rewrites __year/__month/__day lookups into one) or aggregate in Mongo."
+        )
+
+    # Django 4.1 passes (lookup_type, sql, params[, tzname]), earlier releases
+    # (lookup_type, field_name[, tzname]); only lookup_type is needed to refuse either.
+    def date_extract_sql(self, lookup_type, *args, **kwargs):
+        self._unsupported('Extract', lookup_type)
+
+    def datetime_extract_sql(self, lookup_type, *args, **kwargs):
+        self._unsupported('Extract', lookup_type)
+
+    def date_trunc_sql(self, lookup_type, *args, **kwargs):
+        self._unsupported('Trunc', lookup_type)
+
+    def datetime_trunc_sql(self, lookup_type, *args, **kwargs):
+        self._unsupported('Trunc', lookup_type)
 
     def get_db_converters(self, expression):
         converters = super().get_db_converters(expression)
-        return converters
\ No newline at end of file
+        return converters
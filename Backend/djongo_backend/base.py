@@ -0,0 +1,31 @@
+from djongo import base
+from djongo.base import DjongoClient
+
+from Backend.db_operations import CustomDatabaseOperations
+from Backend.mongo import get_client
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    djongo's DatabaseWrapper on the shared client registry (Backend/mongo.py).
+    djongo closes and reopens its MongoClient whenever Django closes a
+    connection, i.e. after every request with CONN_MAX_AGE = 0; here the pooled
+    client stays open for the life of the process.
+
+    djongo ignores OPTIONS['operations_class']; the custom operations (and with
+    them the SQL translation cache, see Backend/db_operations.py) are set here.
+    """
+
+    ops_class = CustomDatabaseOperations
+
+    def get_new_connection(self, connection_params):
+        name = connection_params.pop('name')
+        enforce_schema = connection_params.pop('enforce_schema')
+        self.client_connection = get_client(self.alias)
+        database = self.client_connection[name]
+        self.djongo_connection = DjongoClient(database, enforce_schema)
+        return database
+
+    def _close(self):
+        # The client is shared by the whole process; only this connection is dropped
+        pass
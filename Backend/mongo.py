@@ -0,0 +1,91 @@
+"""
+Process-wide MongoClient registry.
+
+Every raw-pymongo path in the project (Home.utils, scripts, management
+commands) and the djongo backend itself (Backend/djongo_backend) share one
+MongoClient per database alias, configured from DATABASES[alias]['CLIENT']
+(pool size, timeouts, read preference). A MongoClient owns a connection pool and
+monitor threads, so creating one per call, or closing it whenever Django closes
+a connection, costs a fresh TCP/TLS handshake and server discovery each time.
+
+Clients are created lazily (connect=False) and are not fork-safe: after a fork
+(gunicorn pre-fork workers) the child discards the parent's clients and builds
+its own on first use.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from pymongo import MongoClient
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+_clients = {}
+_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def reset():
+    """Forget every client (without closing it; the sockets may belong to a parent process)."""
+    global _pid
+    with _lock:
+        _clients.clear()
+        _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset)
+
+
+def client_options(alias='default'):
+    """MongoClient keyword arguments for a database alias."""
+    options = dict(settings.DATABASES[alias].get('CLIENT', {}))
+    # djongo reads documents as OrderedDicts
+    options.setdefault('document_class', OrderedDict)
+    options['connect'] = False
+    return options
+
+
+def _shared(key, make_options):
+    if _pid != os.getpid():
+        # Forked without register_at_fork support
+        reset()
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = MongoClient(**make_options())
+    return client
+
+
+def get_client(alias='default'):
+    """The shared MongoClient for a database alias."""
+    return _shared(alias, lambda: client_options(alias))
+
+
+def get_client_for(**options):
+    """A shared MongoClient for explicit connection options (one per distinct set of options)."""
+    key = tuple(sorted((name, repr(value)) for name, value in options.items()))
+    return _shared(key, lambda: dict(options, connect=False))
+
+
+def get_database(alias='default', read_preference=None):
+    """
+    The pymongo Database for an alias. `read_preference` (e.g. 'secondaryPreferred')
+    overrides the client's read preference for reads through this handle.
+    """
+    name = settings.DATABASES[alias]['NAME']
+    if read_preference is None:
+        return get_client(alias)[name]
+    mode = read_pref_mode_from_name(read_preference)
+    return get_client(alias).get_database(name, read_preference=make_read_preference(mode, None))
+
+
+def close_all():
+    """Close every client of this process (tests, management commands that exit)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -15,6 +15,13 @@ EMAIL_HOST_USER = "minorproject347d@gmail.com"  # Replace with your email
 EMAIL_HOST_PASSWORD = "yanzzyizaomyuswn"  # Use App Password or SMTP password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Local time ("HH:MM") at which `python manage.py run_attendance_digest` sends the daily emails
+ATTENDANCE_EMAIL_SEND_TIME = config('ATTENDANCE_EMAIL_SEND_TIME', default='16:39')
+# One digest per organization is sent over a single SMTP connection; pause this many
+# seconds between messages and retry a failed message this many times.
+ATTENDANCE_DIGEST_SEND_INTERVAL = config('ATTENDANCE_DIGEST_SEND_INTERVAL', default=0.5, cast=float)
+ATTENDANCE_DIGEST_MAX_RETRIES = config('ATTENDANCE_DIGEST_MAX_RETRIES', default=3, cast=int)
+
 
 # Start the Django development server
 
@@ -92,9 +99,11 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Backend.wsgi.application'
 
 # Database configuration (MongoDB for development)
+# ENGINE is djongo on the shared MongoClient registry (Backend/mongo.py): one pooled
+# client per process, used by djongo and every raw-pymongo path alike.
 DATABASES = {
     'default': {
-        'ENGINE': 'djongo',
+        'ENGINE': 'Backend.djongo_backend',
         'NAME': 'minor_project_db',
         'ENFORCE_SCHEMA': True,
         'CLIENT': {
@@ -102,6 +111,14 @@ DATABASES = {
             'username': '',
             'password': '',
             'authSource': 'admin',
+            'maxPoolSize': config('MONGO_MAX_POOL_SIZE', default=50, cast=int),
+            'minPoolSize': config('MONGO_MIN_POOL_SIZE', default=0, cast=int),
+            'maxIdleTimeMS': config('MONGO_MAX_IDLE_TIME_MS', default=300000, cast=int),
+            'waitQueueTimeoutMS': config('MONGO_WAIT_QUEUE_TIMEOUT_MS', default=5000, cast=int),
+            'serverSelectionTimeoutMS': config('MONGO_SERVER_SELECTION_TIMEOUT_MS', default=5000, cast=int),
+            'connectTimeoutMS': config('MONGO_CONNECT_TIMEOUT_MS', default=5000, cast=int),
+            'socketTimeoutMS': config('MONGO_SOCKET_TIMEOUT_MS', default=30000, cast=int),
+            'readPreference': config('MONGO_READ_PREFERENCE', default='primary'),
         },
         'OPTIONS': {
             'operations_class': 'Backend.db_operations.CustomDatabaseOperations',
@@ -110,11 +127,49 @@ DATABASES = {
     }
 }
 
+# Throwaway database for `python manage.py benchmark_monthly_report --database benchmark`,
+# which seeds up to a million synthetic rows; set BENCHMARK_DB_NAME to enable it.
+if config('BENCHMARK_DB_NAME', default=''):
+    DATABASES['benchmark'] = dict(DATABASES['default'], NAME=config('BENCHMARK_DB_NAME'))
+
+# djongo parses every SQL statement Django emits; parsed statements are cached per
+# template in an LRU of this many entries (Backend/db_operations.py). 0 disables it.
+DJONGO_TRANSLATION_CACHE_SIZE = config('DJONGO_TRANSLATION_CACHE_SIZE', default=512, cast=int)
+
+# Write attendance taps with one atomic find-and-modify upsert (MongoDB 4.2+)
+# instead of get_or_create followed by save().
+ATTENDANCE_ATOMIC_UPSERT = config('ATTENDANCE_ATOMIC_UPSERT', default=True, cast=bool)
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',  # Handles Organization authentication
     'Home.backends.EmployeeSignupBackend',          # Handles EmployeeSignup authentication
 ]
 
+# Password hashing policy (Home/hashers.py). Each role's preferred hasher is pbkdf2,
+# scrypt or argon2 (argon2 needs argon2-cffi); stored hashes that do not match the
+# policy are re-hashed on the next successful login. The first entry of
+# PASSWORD_HASHERS is Django's default; every entry can verify existing hashes.
+# Compare costs with `python manage.py benchmark_password_hashers`.
+PASSWORD_HASHER_POLICY = {
+    'organization': config('ORGANIZATION_PASSWORD_HASHER', default='pbkdf2'),
+    'employee': config('EMPLOYEE_PASSWORD_HASHER', default='pbkdf2'),
+}
+ORGANIZATION_PBKDF2_ITERATIONS = config('ORGANIZATION_PBKDF2_ITERATIONS', default=390000, cast=int)
+EMPLOYEE_PBKDF2_ITERATIONS = config('EMPLOYEE_PBKDF2_ITERATIONS', default=390000, cast=int)
+SCRYPT_WORK_FACTOR = config('SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+SCRYPT_BLOCK_SIZE = config('SCRYPT_BLOCK_SIZE', default=8, cast=int)
+SCRYPT_PARALLELISM = config('SCRYPT_PARALLELISM', default=1, cast=int)
+ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=102400, cast=int)
+ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=8, cast=int)
+PASSWORD_HASHERS = [
+    'Home.hashers.OrganizationPBKDF2PasswordHasher',
+    'Home.hashers.EmployeePBKDF2PasswordHasher',
+    'Home.hashers.TunedScryptPasswordHasher',
+    'Home.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 # Set the primary user model.
 # Since Django supports only one custom user model per project,
 # this is set to "Home.Organization". You must choose one primary model.
@@ -145,12 +200,82 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Resized copies of employee photos and organization logos (see Home/images.py).
+# `python manage.py generate_image_variants` creates them for existing uploads.
+IMAGE_VARIANT_SIZES = config('IMAGE_VARIANT_SIZES', default='64,256,512', cast=lambda v: [int(s) for s in v.split(',')])
+IMAGE_VARIANT_FORMAT = config('IMAGE_VARIANT_FORMAT', default='webp')  # webp or jpeg
+IMAGE_VARIANT_QUALITY = config('IMAGE_VARIANT_QUALITY', default=80, cast=int)
+# Threads that validate uploads and create variants after the request returns
+IMAGE_WORKER_THREADS = config('IMAGE_WORKER_THREADS', default=2, cast=int)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache shared by the RFID index, dashboard counters and cached employee lists.
+# CACHE_BACKEND: locmem (per process), file (shared by workers on one host) or
+# redis (shared by every host; needs the `redis` package). CACHE_LOCATION is the
+# cache directory or Redis URL.
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'attendance-control'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/0'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': 'attendance',
+    }
+}
+
+# Organization dashboard counters live in the cache and are updated in place.
+# Counters older than DASHBOARD_STATS_FRESH_SECONDS are served while a background
+# refresh runs; `python manage.py reconcile_dashboard_counters` recomputes them all.
+# They require a cache shared by every worker (CACHE_BACKEND file or redis); with
+# locmem the dashboard counts from the database on each request and the reconcile
+# command refuses to run.
+DASHBOARD_STATS_FRESH_SECONDS = config('DASHBOARD_STATS_FRESH_SECONDS', default=60, cast=int)
+DASHBOARD_STATS_TTL = config('DASHBOARD_STATS_TTL', default=86400, cast=int)
+
+# RFID write-behind mode: receive_rfid journals taps to a local SQLite file and
+# answers immediately; a background worker drains them into Attendance in batches.
+# Run `python manage.py replay_rfid_queue` after a crash to drain what is left.
+RFID_WRITE_BEHIND = config('RFID_WRITE_BEHIND', default=False, cast=bool)
+RFID_QUEUE_PATH = config('RFID_QUEUE_PATH', default=os.path.join(BASE_DIR, 'rfid_queue.sqlite3'))
+RFID_QUEUE_BATCH_SIZE = config('RFID_QUEUE_BATCH_SIZE', default=200, cast=int)
+RFID_QUEUE_FLUSH_INTERVAL = config('RFID_QUEUE_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Number of web worker processes (the value gunicorn reads). Per-process limits
+# below divide the host's CPUs by it so that all workers together stay in bounds.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+
+# Bulk employee import (api/emp/import/ and `python manage.py import_employees`).
+# Passwords are hashed on BULK_IMPORT_HASH_WORKERS processes once a file has at
+# least BULK_IMPORT_PARALLEL_MIN rows. The pool is started by the first such import
+# and kept by each web worker process, so the default splits half the CPUs between
+# the WEB_CONCURRENCY workers; the host-wide total is workers * BULK_IMPORT_HASH_WORKERS.
+BULK_IMPORT_MAX_ROWS = config('BULK_IMPORT_MAX_ROWS', default=5000, cast=int)
+BULK_IMPORT_BATCH_SIZE = config('BULK_IMPORT_BATCH_SIZE', default=500, cast=int)
+BULK_IMPORT_HASH_WORKERS = config(
+    'BULK_IMPORT_HASH_WORKERS', default=max(1, (os.cpu_count() or 2) // 2 // max(1, WEB_CONCURRENCY)), cast=int
+)
+BULK_IMPORT_PARALLEL_MIN = config('BULK_IMPORT_PARALLEL_MIN', default=16, cast=int)
+
+# Login password checks run behind a per-process semaphore (Home/login.py); a login
+# that waits longer than LOGIN_HASH_WAIT seconds for a slot gets a 503. The limit
+# applies to each worker process, so the default splits half the CPUs between the
+# WEB_CONCURRENCY workers; the host-wide cap is workers * LOGIN_HASH_CONCURRENCY.
+LOGIN_HASH_CONCURRENCY = config(
+    'LOGIN_HASH_CONCURRENCY', default=max(1, (os.cpu_count() or 2) // 2 // max(1, WEB_CONCURRENCY)), cast=int
+)
+LOGIN_HASH_WAIT = config('LOGIN_HASH_WAIT', default=2.0, cast=float)
+
 # Django REST Framework: Use JWT Authentication
 REST_FRAMEWORK = {
+    # Builds request.user from token claims; no user lookup per request (Home/authentication.py)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Home.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -163,6 +288,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_USER_CLASS': 'Home.authentication.ClaimsUser',
+    'TOKEN_REFRESH_SERIALIZER': 'Home.authentication.RevocationAwareTokenRefreshSerializer',
 }
 
 # CORS configuration: allow your React frontend to access the backend
@@ -172,6 +299,10 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_CREDENTIALS = True
 
+# Revocation lookups (Home/authentication.py) are cached this long; with the locmem
+# cache it is also how long other workers may accept a token revoked elsewhere.
+JWT_REVOCATION_CHECK_SECONDS = config('JWT_REVOCATION_CHECK_SECONDS', default=30, cast=int)
+
 # Session and CSRF cookie settings (for non-JWT parts, if needed)
 SESSION_COOKIE_SECURE = False  # Use True in production with HTTPS
 SESSION_COOKIE_SAMESITE = 'Lax'
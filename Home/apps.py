@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Home'
+
+    def ready(self):
+        # Register signal handlers (RFID index invalidation, dashboard counters)
+        from . import signals  # noqa: F401
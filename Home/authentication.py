@@ -0,0 +1,214 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's JWTAuthentication loads the user from MongoDB on every request and
+always resolves the token's user_id against AUTH_USER_MODEL (Organization), so an
+employee's token resolved to whichever organization shared its id. Tokens issued
+by issue_tokens() carry the role, display name and organization id as claims;
+ClaimsJWTAuthentication turns them into a ClaimsUser without touching the
+database, and the model instance is only loaded when a view reads a field the
+claims do not cover (user.instance, or any attribute delegated to it).
+
+Logout revokes the token's jti, and deleting or deactivating an account revokes
+every token issued to it before that moment. Revocations are recorded in a
+MongoDB collection whose TTL index drops them when the tokens they cover
+expire; that collection is the only record. Lookups go through the cache for
+JWT_REVOCATION_CHECK_SECONDS, so a token costs one _id query per window rather
+than one per request. A revocation is written to the cache as well: with a
+shared cache (file or Redis) every worker sees it at once, with the per-process
+locmem cache other workers see it when their cached lookup expires. An entry the
+cache evicted is simply looked up again.
+
+Tokens without a role claim were issued before role claims existed (the old
+employee_login did not add one) and are refused; their holders log in again.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.permissions import BasePermission
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from .cache import make_key
+from .utils import get_database
+
+ORGANIZATION = 'organization'
+EMPLOYEE = 'employee'
+
+
+def issue_tokens(user, role):
+    """Refresh token (and, through .access_token, access token) carrying the user's claims."""
+    refresh = RefreshToken.for_user(user)
+    refresh['role'] = role
+    refresh['name'] = user.name
+    refresh['org'] = user.pk if role == ORGANIZATION else user.organization_id
+    return refresh
+
+
+# Raw collection of revocations; a TTL index on expires_at removes them
+REVOCATION_COLLECTION = 'Home_jwtrevocation'
+
+_ttl_index_ready = False
+
+
+def _revocations():
+    global _ttl_index_ready
+    collection = get_database()[REVOCATION_COLLECTION]
+    if not _ttl_index_ready:
+        collection.create_index('expires_at', expireAfterSeconds=0)
+        _ttl_index_ready = True
+    return collection
+
+
+def _revoked_key(jti):
+    return make_key('jwt', 'revoked', jti)
+
+
+def _cutoff_key(role, user_id):
+    return make_key('jwt', 'cutoff', role, user_id)
+
+
+def _record(key, value, ttl):
+    expires_at = datetime.fromtimestamp(time.time() + ttl, dt_timezone.utc)
+    _revocations().replace_one({'_id': key}, {'_id': key, 'value': value, 'expires_at': expires_at}, upsert=True)
+    cache.set(key, value, min(ttl, settings.JWT_REVOCATION_CHECK_SECONDS))
+
+
+def _lookup(keys):
+    """
+    {key: value} for revocation keys; 0 means "not revoked". Keys the cache does
+    not hold (never looked up, expired or evicted) are read from the collection.
+    """
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = {document['_id']: document['value']
+                  for document in _revocations().find({'_id': {'$in': missing}})}
+        fetched = {key: stored.get(key, 0) for key in missing}
+        cache.set_many(fetched, settings.JWT_REVOCATION_CHECK_SECONDS)
+        found.update(fetched)
+    return found
+
+
+def revoke_token(token):
+    """Reject this token (by jti) until it expires."""
+    ttl = max(1, int(token['exp'] - time.time()))
+    _record(_revoked_key(token[api_settings.JTI_CLAIM]), True, ttl)
+
+
+def revoke_user(role, user_id):
+    """Reject every token issued to an account up to now."""
+    ttl = int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+    _record(_cutoff_key(role, user_id), int(time.time()), ttl)
+
+
+def check_role(token):
+    """Refuse tokens without a (known) role claim; the role cannot be guessed from the user id."""
+    if token.get('role') not in (ORGANIZATION, EMPLOYEE):
+        raise InvalidToken("Token has no role claim; log in again")
+
+
+def is_revoked(token):
+    keys = [_revoked_key(token[api_settings.JTI_CLAIM]), _cutoff_key(token['role'], token[api_settings.USER_ID_CLAIM])]
+    found = _lookup(keys)
+    if found[keys[0]]:
+        return True
+    cutoff = found[keys[1]]
+    return bool(cutoff) and token.get('iat', 0) <= cutoff
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user built from token claims. `role`, `name` and `organization_id`
+    come from the token; anything else is read from the model instance, which is
+    loaded on first use.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_organization(self):
+        return self.role == ORGANIZATION
+
+    @property
+    def is_employee(self):
+        return self.role == EMPLOYEE
+
+    @cached_property
+    def name(self):
+        if 'name' in self.token:
+            return self.token['name']
+        return self.instance.name
+
+    @cached_property
+    def organization_id(self):
+        if self.is_organization:
+            return self.pk
+        if 'org' in self.token:
+            return self.token['org']
+        return self.instance.organization_id
+
+    @cached_property
+    def instance(self):
+        """The Organization or EmployeeSignup the token was issued to."""
+        from .models import EmployeeSignup, Organization
+
+        model = Organization if self.is_organization else EmployeeSignup
+        return model.objects.get(pk=self.pk)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'token':
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __eq__(self, other):
+        return isinstance(other, ClaimsUser) and (self.role, self.pk) == (other.role, other.pk)
+
+    def __hash__(self):
+        return hash((self.role, self.pk))
+
+    def __str__(self):
+        return f"{self.role.title()} {self.pk}"
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication that builds a ClaimsUser instead of querying the user."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        check_role(validated_token)
+        if is_revoked(validated_token):
+            raise InvalidToken("Token has been revoked")
+        return ClaimsUser(validated_token)
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuse to refresh a token that was revoked by logout or by account removal."""
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['refresh'])
+        check_role(token)
+        if is_revoked(token):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+
+class IsOrganization(BasePermission):
+    """Only organization tokens; employee tokens cannot act for their organization."""
+
+    def has_permission(self, request, view):
+        from .models import Organization
+
+        if isinstance(request.user, ClaimsUser):
+            return request.user.is_organization
+        return isinstance(request.user, Organization)
@@ -0,0 +1,345 @@
+"""
+Bulk employee onboarding from a CSV file and an optional ZIP of photos.
+
+CSV columns: name, email, password, unique_id (required), rfid and photo
+(optional). `photo` names a file inside the ZIP; without it the importer looks
+for `<unique_id>.jpg|jpeg|png|gif`.
+
+The import validates every row first, then checks email, unique_id and rfid
+against the database with a single query, hashes the passwords of the valid
+rows in parallel on a process pool, and inserts them with bulk_create. Rows
+that fail are reported with their line number; the others are imported.
+Photos of rows that fail to insert are deleted from storage again.
+
+The hashing pool is created on first use and kept for the life of the process:
+spawning its workers (each runs django.setup()) costs seconds, far more than
+hashing a typical file. Every web worker keeps its own pool, so
+BULK_IMPORT_HASH_WORKERS is sized per web worker (see settings).
+"""
+import atexit
+import csv
+import io
+import logging
+import multiprocessing
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.validators import validate_email
+from django.db import DatabaseError
+from django.db.models import Q
+
+from . import counters
+from .cache import bump_org_version
+from .hashers import hash_password
+from .image_worker import image_worker
+from .images import delete_image
+from .models import EmployeeSignup
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['name', 'email', 'password', 'unique_id']
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+MAX_PHOTO_SIZE = 5 * 1024 * 1024
+
+
+class BulkImportError(ValueError):
+    """The file as a whole cannot be imported (bad CSV, missing columns, too many rows)."""
+
+
+def read_rows(csv_file):
+    """Parse an uploaded CSV (bytes or text) into a list of (line number, row dict)."""
+    raw = csv_file.read()
+    try:
+        text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+    except UnicodeDecodeError:
+        raise BulkImportError('The CSV file must be UTF-8 encoded')
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise BulkImportError('The CSV file is empty')
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+    if missing:
+        raise BulkImportError(f"Missing column(s): {', '.join(missing)}")
+
+    rows = [
+        (reader.line_num, {key: (value or '').strip() for key, value in row.items() if key})
+        for row in reader
+    ]
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise BulkImportError(f'At most {settings.BULK_IMPORT_MAX_ROWS} rows can be imported at once')
+    return rows
+
+
+def _photo_index(photos_zip):
+    """Map lower-cased file names (without directories) in the ZIP to their ZipInfo."""
+    return {
+        posixpath.basename(info.filename).lower(): info
+        for info in photos_zip.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(PHOTO_EXTENSIONS)
+    }
+
+
+def _find_photo(row, photos):
+    if row.get('photo'):
+        return photos.get(posixpath.basename(row['photo']).lower())
+    for extension in PHOTO_EXTENSIONS:
+        info = photos.get(f"{row['unique_id'].lower()}{extension}")
+        if info is not None:
+            return info
+    return None
+
+
+def validate_rows(rows, photos=None):
+    """
+    Check each row on its own and against the rest of the file and the database.
+    Returns (valid rows, {line number: [errors]}). The database check is one
+    query covering every email, unique_id and rfid in the file.
+    """
+    errors = {}
+    seen = {'email': {}, 'unique_id': {}, 'rfid': {}}
+    candidates = []
+    for line, row in rows:
+        row_errors = [f'{column.replace("_", " ").title()} is required' for column in REQUIRED_COLUMNS if not row.get(column)]
+        if row.get('email'):
+            row['email'] = row['email'].lower()
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                row_errors.append('Invalid email address')
+        for field in seen:
+            value = row.get(field)
+            if value:
+                if value in seen[field]:
+                    row_errors.append(f'Duplicate {field} (also on line {seen[field][value]})')
+                else:
+                    seen[field][value] = line
+        if photos is not None and not row_errors:
+            info = _find_photo(row, photos)
+            if row.get('photo') and info is None:
+                row_errors.append(f"Photo {row['photo']} not found in the ZIP")
+            elif info is not None and info.file_size > MAX_PHOTO_SIZE:
+                row_errors.append('Image size must be under 5MB')
+            row['_photo'] = info
+        if row_errors:
+            errors[line] = row_errors
+        else:
+            candidates.append((line, row))
+
+    # One set-based query for every value that must be unique
+    existing = {'email': set(), 'unique_id': set(), 'rfid': set()}
+    if candidates:
+        conflicts = EmployeeSignup.objects.filter(
+            Q(email__in=list(seen['email'])) |
+            Q(unique_id__in=list(seen['unique_id'])) |
+            Q(rfid__in=list(seen['rfid']))
+        ).values_list('email', 'unique_id', 'rfid')
+        for email, unique_id, rfid in conflicts:
+            existing['email'].add(email)
+            existing['unique_id'].add(unique_id)
+            existing['rfid'].add(rfid)
+
+    valid = []
+    labels = {'email': 'Email already registered', 'unique_id': 'Employee ID already exists',
+              'rfid': 'RFID card already assigned to another employee'}
+    for line, row in candidates:
+        row_errors = [message for field, message in labels.items() if row.get(field) and row[field] in existing[field]]
+        if row_errors:
+            errors[line] = row_errors
+        else:
+            valid.append((line, row))
+    return valid, errors
+
+
+def _init_hash_worker():
+    # Spawned workers start from scratch; hashing needs configured settings
+    import django
+    django.setup()
+
+
+class HashPool:
+    """Process-wide spawn pool for password hashing (created on first use, reused by every import)."""
+
+    def __init__(self):
+        self._executor = None
+        self._workers = None
+        self._lock = threading.Lock()
+
+    def get(self, workers):
+        with self._lock:
+            if self._executor is not None and self._workers != workers:
+                # Only the import_employees --workers option asks for another size
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                # spawn, not fork: the parent holds MongoDB sockets and request threads
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_hash_worker)
+                self._workers = workers
+                atexit.unregister(self.shutdown)
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def discard(self, executor):
+        """Forget a broken pool so the next import starts a new one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+hash_pool = HashPool()
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash employee passwords, spread over the shared process pool for large batches."""
+    hash_employee_password = partial(hash_password, role='employee')
+    workers = workers or settings.BULK_IMPORT_HASH_WORKERS
+    if workers <= 1 or len(passwords) < settings.BULK_IMPORT_PARALLEL_MIN:
+        return [hash_employee_password(password) for password in passwords]
+    pool = hash_pool.get(workers)
+    chunksize = max(1, len(passwords) // (workers * 4))
+    try:
+        return list(pool.map(hash_employee_password, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (OOM, killed); hash this batch here and start afresh next time
+        logger.warning("⚠️ Password hashing pool broke; hashing in the request process")
+        hash_pool.discard(pool)
+        return [hash_employee_password(password) for password in passwords]
+
+
+def _insert(batch, errors):
+    """bulk_create one batch; on a conflict, find out which rows made it and retry the rest one by one."""
+    try:
+        EmployeeSignup.objects.bulk_create([employee for _, employee in batch])
+        return len(batch)
+    except DatabaseError:
+        pass
+
+    # Inserts stop at the first conflicting row (someone added an employee since validation)
+    present = set(EmployeeSignup.objects.filter(
+        email__in=[employee.email for _, employee in batch]
+    ).values_list('email', 'unique_id'))
+    created = 0
+    for line, employee in batch:
+        if (employee.email, employee.unique_id) in present:
+            created += 1
+            continue
+        try:
+            EmployeeSignup.objects.bulk_create([employee])
+            created += 1
+        except DatabaseError:
+            errors[line] = ['Email, Employee ID or RFID already exists']
+    return created
+
+
+def _delete_orphan_photos(employees):
+    """
+    Photos are stored before the insert (the document holds their name); delete
+    those of employees that did not make it into the database.
+    """
+    if not employees:
+        return
+    try:
+        inserted = set(EmployeeSignup.objects.filter(
+            email__in=[employee.email for employee in employees]
+        ).values_list('email', 'photo'))
+        for employee in employees:
+            if (employee.email, employee.photo.name) not in inserted:
+                delete_image(employee.photo)
+    except Exception as e:
+        logger.error(f"⚠️ Could not remove photos of employees that failed to import: {str(e)}")
+
+
+def import_employees(organization, csv_file, photos_file=None, dry_run=False, workers=None):
+    """
+    Import employees for `organization`. Returns a report with the counts,
+    per-row errors ({'line': n, 'errors': [...]}) and timings/throughput.
+    Raises BulkImportError when the file itself is unusable.
+    """
+    started = time.perf_counter()
+    timings = {}
+    photos_zip = None
+    try:
+        if photos_file is not None:
+            try:
+                photos_zip = zipfile.ZipFile(photos_file)
+            except zipfile.BadZipFile:
+                raise BulkImportError('The photos file is not a valid ZIP archive')
+
+        rows = read_rows(csv_file)
+        valid, errors = validate_rows(rows, _photo_index(photos_zip) if photos_zip else None)
+        timings['validate'] = time.perf_counter() - started
+
+        created = 0
+        if valid and not dry_run:
+            mark = time.perf_counter()
+            hashes = hash_passwords([row['password'] for _, row in valid], workers)
+            timings['hash'] = time.perf_counter() - mark
+
+            mark = time.perf_counter()
+            employees = []
+            for (line, row), password in zip(valid, hashes):
+                employee = EmployeeSignup(
+                    name=row['name'],
+                    email=row['email'],
+                    password=password,
+                    unique_id=row['unique_id'],
+                    rfid=row.get('rfid') or None,
+                    organization=organization,
+                    is_active=True,
+                )
+                info = row.get('_photo')
+                if info is not None:
+                    employee.photo.save(posixpath.basename(info.filename), ContentFile(photos_zip.read(info)), save=False)
+                    employee.photo_status = 'pending'
+                employees.append((line, employee))
+
+            batch_size = settings.BULK_IMPORT_BATCH_SIZE
+            try:
+                for start in range(0, len(employees), batch_size):
+                    created += _insert(employees[start:start + batch_size], errors)
+            finally:
+                _delete_orphan_photos([employee for _, employee in employees if employee.photo])
+            timings['insert'] = time.perf_counter() - mark
+    finally:
+        if photos_zip is not None:
+            photos_zip.close()
+
+    if created:
+        # bulk_create sends no post_save signals; do what the receivers would
+        bump_org_version(organization.pk)
+        counters.increment(organization.pk, counters.EMPLOYEE_COUNT, created)
+        pending = EmployeeSignup.objects.filter(
+            email__in=[row['email'] for _, row in valid], photo_status='pending'
+        ).only('id')
+        for employee in pending:
+            image_worker.submit(employee)
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"📥 Employee import for organization {organization.pk}: "
+                f"{created} created, {len(errors)} failed in {elapsed:.2f}s")
+    return {
+        'rows': len(rows),
+        'valid': len(valid),
+        'created': created,
+        'failed': len(errors),
+        'dry_run': dry_run,
+        'errors': [{'line': line, 'errors': errors[line]} for line in sorted(errors)],
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(created / elapsed, 1) if created and elapsed else 0.0,
+        'timings': {name: round(value, 3) for name, value in timings.items()},
+    }
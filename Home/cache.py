@@ -0,0 +1,97 @@
+"""
+Cache helpers shared by the RFID index, dashboard counters and cached API responses.
+
+Keys are namespaced ("<namespace>:<part>:<part>..."). Per-organization data is
+additionally keyed by an organization version number: bumping the version makes
+every cached entry for that organization unreachable at once, and the stale
+entries expire on their own TTL. A version starts from the current time in
+nanoseconds rather than 1, so a version key that was evicted (or a cache that
+restarted) never comes back with a number whose old entries are still stored.
+The backend itself (locmem, file or Redis) is chosen in Backend/settings.py.
+
+Per-organization responses are only cached in a cache every worker shares: a
+bump in one worker cannot reach another worker's locmem cache, which would go on
+serving the old pages, so without a shared cache they are computed every time.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Default TTLs (seconds) per namespace; anything else uses the cache's TIMEOUT
+TTLS = {
+    'employees': 300,
+    'rfid': 3600,
+}
+
+
+def is_shared():
+    """
+    Whether the default cache is seen by every worker process. locmem (and the
+    dummy cache) is private to one process, so state that must agree across
+    workers, such as the dashboard counters, cannot live in it.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def make_key(namespace, *parts):
+    """Build a namespaced cache key."""
+    return ':'.join([namespace] + [str(part) for part in parts])
+
+
+def ttl_for(namespace):
+    return TTLS.get(namespace, settings.CACHES['default'].get('TIMEOUT', 300))
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def org_version(org_id):
+    """Current cache version of an organization (created on first use, never expires)."""
+    return cache.get_or_set(make_key('org-version', org_id), _new_version, None)
+
+
+def bump_org_version(org_id):
+    """Invalidate everything cached for an organization."""
+    key = make_key('org-version', org_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, None)
+        return version
+
+
+def org_key(org_id, namespace, *parts):
+    """Namespaced key for per-organization data, tied to the organization's current version."""
+    return make_key(namespace, org_id, f'v{org_version(org_id)}', *parts)
+
+
+def get_org(org_id, namespace, *parts, default=None):
+    if not is_shared():
+        return default
+    return cache.get(org_key(org_id, namespace, *parts), default)
+
+
+def set_org(org_id, namespace, *parts, value, ttl=None):
+    if not is_shared():
+        return
+    cache.set(org_key(org_id, namespace, *parts), value, ttl if ttl is not None else ttl_for(namespace))
+
+
+def get_or_set_org(org_id, namespace, *parts, compute, ttl=None):
+    """
+    Return the cached value for an organization key, computing and storing it on
+    a miss (always computing it when the cache is not shared).
+    """
+    if not is_shared():
+        return compute()
+    key = org_key(org_id, namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, ttl if ttl is not None else ttl_for(namespace))
+    return value
@@ -0,0 +1,118 @@
+"""
+Organization dashboard counters, kept in the cache and updated in place.
+
+They need a cache every worker shares (file or Redis, see CACHE_BACKEND in
+Backend/settings.py): with the per-process locmem cache each worker would hold
+its own copy that only its own writes move, and the reconcile command would
+refresh a cache no worker reads. Without a shared cache the dashboard counts
+from the database on every read instead.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import is_shared, make_key
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT = 'query_count'
+EMPLOYEE_COUNT = 'employee_count'
+ATTENDANCE_TODAY = 'attendance_today'
+
+
+def _key(org_id, name, day=None):
+    if name == ATTENDANCE_TODAY:
+        # Attendance is counted per day, so yesterday's counter simply ages out
+        return make_key('dashboard', org_id, 'attendance', (day or timezone.now().date()).isoformat())
+    return make_key('dashboard', org_id, name)
+
+
+def _refreshed_key(org_id):
+    return make_key('dashboard', org_id, 'refreshed_at')
+
+
+def compute_stats(org_id):
+    """Count queries, employees and today's attendance for an organization from the database."""
+    from . import repository
+    from .models import Query
+
+    employee_ids = [row['id'] for row in repository.employee_rows(org_id, fields=('id',))]
+    return {
+        QUERY_COUNT: Query.objects.filter(organization_id=org_id).count(),
+        EMPLOYEE_COUNT: len(employee_ids),
+        ATTENDANCE_TODAY: repository.count_attendance(employee_ids, timezone.now().date()),
+    }
+
+
+def refresh_stats(org_id):
+    """Recompute an organization's counters and store them in the cache."""
+    stats = compute_stats(org_id)
+    ttl = settings.DASHBOARD_STATS_TTL
+    cache.set_many({_key(org_id, name): value for name, value in stats.items()}, ttl)
+    cache.set(_refreshed_key(org_id), time.time(), ttl)
+    return stats
+
+
+def _refresh_in_background(org_id):
+    # Only one refresh per organization at a time, across every worker sharing the cache
+    lock_key = make_key('dashboard', org_id, 'refreshing')
+    if not cache.add(lock_key, 1, 30):
+        return
+
+    def run():
+        try:
+            refresh_stats(org_id)
+        except Exception as e:
+            logger.error(f"⚠️ Dashboard counter refresh failed for organization {org_id}: {str(e)}")
+        finally:
+            cache.delete(lock_key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_dashboard_stats(org_id):
+    """
+    Return the dashboard counters for an organization from the cache.
+    Missing counters are computed synchronously; counters older than
+    DASHBOARD_STATS_FRESH_SECONDS are served as-is while a background
+    refresh brings them up to date (stale-while-revalidate).
+    Without a shared cache they are always counted from the database.
+    """
+    if not is_shared():
+        return compute_stats(org_id)
+
+    names = [QUERY_COUNT, EMPLOYEE_COUNT, ATTENDANCE_TODAY]
+    keys = {name: _key(org_id, name) for name in names}
+    cached = cache.get_many(list(keys.values()) + [_refreshed_key(org_id)])
+
+    if any(key not in cached for key in keys.values()):
+        return refresh_stats(org_id)
+
+    refreshed_at = cached.get(_refreshed_key(org_id)) or 0
+    if time.time() - refreshed_at > settings.DASHBOARD_STATS_FRESH_SECONDS:
+        _refresh_in_background(org_id)
+    return {name: cached[key] for name, key in keys.items()}
+
+
+def increment(org_id, name, delta=1, day=None):
+    """
+    Adjust a cached counter in place. Counters that are not cached yet are left
+    alone; the next dashboard read computes them from the database.
+    """
+    if not is_shared():
+        return
+    try:
+        cache.incr(_key(org_id, name, day), delta)
+    except ValueError:
+        pass
+
+
+def forget(org_id, name, day=None):
+    """Drop a cached counter so the next read recomputes it."""
+    if not is_shared():
+        return
+    cache.delete(_key(org_id, name, day))
@@ -0,0 +1,78 @@
+"""
+Password hasher policy.
+
+Each role (organization, employee) has a preferred hasher chosen in settings
+(PASSWORD_HASHER_POLICY: pbkdf2, scrypt or argon2) with tunable cost
+parameters. New passwords are hashed with the role's preferred hasher, and a
+successful login re-hashes a stored password whose algorithm or cost differs
+from the current policy, so changing the policy migrates users as they log in.
+Every hasher listed in PASSWORD_HASHERS can still verify old hashes.
+
+`python manage.py benchmark_password_hashers` reports verify latency per hasher.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    check_password,
+    make_password,
+)
+
+ROLES = ('organization', 'employee')
+
+
+class OrganizationPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.ORGANIZATION_PBKDF2_ITERATIONS
+
+
+class EmployeePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # Same algorithm as the organization hasher; only the iteration count differs
+    iterations = settings.EMPLOYEE_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.SCRYPT_WORK_FACTOR
+    block_size = settings.SCRYPT_BLOCK_SIZE
+    parallelism = settings.SCRYPT_PARALLELISM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    # Needs the argon2-cffi package
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+PBKDF2_BY_ROLE = {
+    'organization': OrganizationPBKDF2PasswordHasher,
+    'employee': EmployeePBKDF2PasswordHasher,
+}
+HASHERS = {
+    'scrypt': TunedScryptPasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+}
+
+
+@lru_cache(maxsize=None)
+def preferred_hasher(role):
+    """Hasher instance new passwords of `role` are hashed with."""
+    name = settings.PASSWORD_HASHER_POLICY[role]
+    if name == 'pbkdf2':
+        return PBKDF2_BY_ROLE[role]()
+    return HASHERS[name]()
+
+
+def hash_password(raw_password, role):
+    return make_password(raw_password, hasher=preferred_hasher(role))
+
+
+def verify_password(raw_password, encoded, role, setter=None):
+    """
+    Check a password against its stored hash. When it matches and the hash does
+    not follow the role's current policy, setter(raw_password) is called to
+    store an upgraded hash.
+    """
+    return check_password(raw_password, encoded, setter, preferred=preferred_hasher(role))
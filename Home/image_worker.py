@@ -0,0 +1,134 @@
+"""
+Background processing of uploaded employee photos and organization logos.
+
+The upload views only run the cheap checks (file size, declared content type,
+and inspect_image() on the header), store the file and mark it `pending`. A
+small thread pool then decodes the stored file and writes the resized variants
+(Home/images.py); an upload that fails to decode is deleted from storage with
+any variants, and its field cleared. Pillow releases the
+GIL while decoding, resizing and encoding, so threads keep up without a process
+pool. The status field (photo_status / logo_status) moves
+pending -> processing -> ready | failed; rows left `pending` after a restart are
+picked up by `python manage.py generate_image_variants --reprocess --status pending`.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from PIL import Image
+
+from .cache import bump_org_version
+from .images import delete_image, generate_variants
+from .models import EmployeeSignup, Organization
+
+logger = logging.getLogger(__name__)
+
+MAX_DIMENSION = 2000
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF'}
+
+# model -> (image field, status field, crop to a square)
+IMAGE_FIELDS = {
+    EmployeeSignup: ('photo', 'photo_status', True),
+    Organization: ('logo', 'logo_status', False),
+}
+
+
+def inspect_image(handle):
+    """
+    Check an image file's structure, format and dimensions without decoding the
+    pixels. Returns an error message, or None if the image is acceptable.
+    """
+    try:
+        image = Image.open(handle)
+        image.verify()
+    except Exception:
+        return "File is not a valid image"
+    if image.format not in ALLOWED_FORMATS:
+        return "Image must be JPEG, PNG, or GIF format"
+    width, height = image.size
+    if width > MAX_DIMENSION or height > MAX_DIMENSION:
+        return "Image dimensions must be 2000x2000 pixels or smaller"
+    return None
+
+
+def validate_stored_image(field_file):
+    """Inspect a stored upload (bulk imports and backfills reach the worker unchecked)."""
+    with field_file.storage.open(field_file.name, 'rb') as handle:
+        return inspect_image(handle)
+
+
+def _update(instance, **values):
+    """
+    Write image fields with update(): a status change needs none of the post_save
+    receivers (RFID index, counters, token revocation), only fresh cached lists.
+    """
+    type(instance).objects.filter(pk=instance.pk).update(**values)
+    for name, value in values.items():
+        setattr(instance, name, value)
+    bump_org_version(instance.pk if isinstance(instance, Organization) else instance.organization_id)
+
+
+def process_image(model, pk, overwrite=False):
+    """Validate one stored image and create its variants. Returns the final status."""
+    field, status_field, crop = IMAGE_FIELDS[model]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, field):
+        return None
+
+    field_file = getattr(instance, field)
+    _update(instance, **{status_field: 'processing'})
+    try:
+        error = validate_stored_image(field_file)
+        if error is None:
+            generate_variants(field_file, crop=crop, overwrite=overwrite)
+    except Exception as e:
+        error = str(e)
+
+    if error:
+        # Never keep (or serve) a file that is not a valid image
+        logger.warning(f"⚠️ Image {field_file.name} rejected and deleted: {error}")
+        delete_image(field_file)
+        _update(instance, **{field: None, status_field: 'failed'})
+    else:
+        _update(instance, **{status_field: 'ready'})
+    return getattr(instance, status_field)
+
+
+class ImageWorker:
+    """Process-wide thread pool for process_image jobs (created on first use)."""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='image-worker')
+            return self._executor
+
+    def _run(self, model, pk, overwrite):
+        try:
+            return process_image(model, pk, overwrite)
+        except Exception as e:
+            logger.error(f"⚠️ Image processing failed for {model.__name__} {pk}: {str(e)}")
+            return None
+        finally:
+            close_old_connections()
+
+    def submit(self, instance, overwrite=False):
+        """Queue an employee's photo or an organization's logo; returns a Future of the final status."""
+        return self._pool().submit(self._run, type(instance), instance.pk, overwrite)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Shared per-process instance used by the upload views
+image_worker = ImageWorker(settings.IMAGE_WORKER_THREADS)
@@ -0,0 +1,124 @@
+"""
+Resized variants of employee photos and organization logos.
+
+Every upload gets fixed-size copies (IMAGE_VARIANT_SIZES, e.g. 64/256/512 px)
+stored next to the original under a deterministic name:
+
+    employees_photos/jane.png -> employees_photos/variants/jane.png_256.webp
+
+Because the names are derived from the original, serializers can build the
+variant URLs without touching storage. Variants are created by the background
+image worker (Home/image_worker.py) after an upload; `python manage.py
+generate_image_variants` backfills older uploads.
+"""
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Pillow format name and file extension per configured variant format
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+
+def variant_sizes():
+    return tuple(settings.IMAGE_VARIANT_SIZES)
+
+
+def variant_format():
+    """Configured variant format, falling back to JPEG when Pillow was built without WebP."""
+    name = settings.IMAGE_VARIANT_FORMAT
+    if name == 'webp' and not features.check('webp'):
+        name = 'jpeg'
+    return FORMATS[name]
+
+
+def variant_name(name, size):
+    """
+    Storage name of the `size` px variant of the original stored as `name`.
+    Keeps the original's extension: storage only makes names unique per full
+    filename, so face.png and face.jpg must not share variants.
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'variants', f'{filename}_{size}.{variant_format()[1]}')
+
+
+def _render(image, size, crop):
+    if crop:
+        # Square thumbnail (photos): scale and centre-crop to exactly size x size
+        return ImageOps.fit(image, (size, size), Image.LANCZOS)
+    # Bounded thumbnail (logos): keep the aspect ratio, longest side = size
+    resized = image.copy()
+    resized.thumbnail((size, size), Image.LANCZOS)
+    return resized
+
+
+def _encode(image, pil_format):
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel; flatten transparent logos onto white
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file, crop=True, overwrite=False):
+    """
+    Create the resized variants of a stored image (an ImageField value).
+    Existing variants are kept unless `overwrite` is set. Returns the list of
+    variant names written.
+    """
+    if not field_file:
+        return []
+    storage = field_file.storage
+    pil_format = variant_format()[0]
+    pending = [size for size in variant_sizes()
+               if overwrite or not storage.exists(variant_name(field_file.name, size))]
+    if not pending:
+        return []
+
+    with storage.open(field_file.name, 'rb') as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+    written = []
+    for size in pending:
+        name = variant_name(field_file.name, size)
+        if storage.exists(name):
+            storage.delete(name)
+        saved = storage.save(name, ContentFile(_encode(_render(image, size, crop), pil_format)))
+        written.append(saved)
+    return written
+
+
+def image_url(field_file, status, request=None):
+    """URL of an original upload (absolute when a request is given), once the image worker accepted it."""
+    if not field_file or status != 'ready':
+        return None
+    return request.build_absolute_uri(field_file.url) if request else field_file.url
+
+
+def delete_image(field_file):
+    """Remove a stored original and whatever variants were written for it."""
+    storage = field_file.storage
+    for name in [field_file.name] + [variant_name(field_file.name, size) for size in variant_sizes()]:
+        if storage.exists(name):
+            storage.delete(name)
+
+
+def variant_urls(field_file, request=None):
+    """Map of size -> URL of each variant (absolute when a request is given)."""
+    if not field_file:
+        return None
+    urls = {}
+    for size in variant_sizes():
+        url = field_file.storage.url(variant_name(field_file.name, size))
+        urls[str(size)] = request.build_absolute_uri(url) if request else url
+    return urls
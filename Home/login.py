@@ -0,0 +1,124 @@
+"""
+Login helpers for organization_login and employee_login.
+
+Each endpoint calls its own backend directly instead of going through
+django.contrib.auth.authenticate(), which would try ModelBackend
+(Organization) and then EmployeeSignupBackend in turn. An employee login
+therefore no longer pays for a failed Organization lookup, and an employee's
+credentials can no longer log in through the organization endpoint.
+
+Password checks are CPU-bound, so they run behind a bounded semaphore
+(LOGIN_HASH_CONCURRENCY per process). A login that cannot get a slot within
+LOGIN_HASH_WAIT seconds is refused with HashingBusy (the views answer 503),
+which keeps a login storm from starving RFID scans of CPU. Latency of every
+check is recorded per kind and exposed by hashing_gate.stats().
+
+The limit is per worker process: with N workers up to N * LOGIN_HASH_CONCURRENCY
+checks run at once on the host. The default divides the CPU budget by
+WEB_CONCURRENCY (the worker count gunicorn reads), so set that, or size
+LOGIN_HASH_CONCURRENCY by hand, when running more than one worker. stats() (and
+the endpoint serving it) describes only the worker that answered.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from .backends import EmployeeSignupBackend
+
+
+class HashingBusy(Exception):
+    """No password-hashing slot became free in time."""
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class HashingGate:
+    """Bounded concurrency and latency metrics for password checks."""
+
+    SAMPLES = 1000
+
+    def __init__(self, limit, wait):
+        self.limit = limit
+        self.wait = wait
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counts = {}
+        self.in_flight = 0
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self, kind):
+        if not self._semaphore.acquire(timeout=self.wait):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self._latencies.setdefault(kind, deque(maxlen=self.SAMPLES)).append(elapsed)
+                self._counts[kind] = self._counts.get(kind, 0) + 1
+            self._semaphore.release()
+
+    def stats(self):
+        """Concurrency limit, current load and latency (ms, last SAMPLES checks) per login kind."""
+        with self._lock:
+            latencies = {kind: sorted(samples) for kind, samples in self._latencies.items()}
+            result = {
+                'pid': os.getpid(),
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'rejected': self.rejected,
+                'latency_ms': {},
+            }
+            for kind, ordered in latencies.items():
+                result['latency_ms'][kind] = {
+                    'count': self._counts[kind],
+                    'avg': round(sum(ordered) / len(ordered), 2),
+                    'p50': round(_percentile(ordered, 0.5), 2),
+                    'p95': round(_percentile(ordered, 0.95), 2),
+                    'max': round(ordered[-1], 2),
+                }
+            return result
+
+
+# Shared per-process gate used by the login views
+hashing_gate = HashingGate(settings.LOGIN_HASH_CONCURRENCY, settings.LOGIN_HASH_WAIT)
+
+_organization_backend = ModelBackend()
+_employee_backend = EmployeeSignupBackend()
+
+
+def _backend_path(backend):
+    return f'{type(backend).__module__}.{type(backend).__qualname__}'
+
+
+def authenticate_organization(request, email, password):
+    """Check organization credentials with ModelBackend only. Raises HashingBusy."""
+    with hashing_gate.slot('organization'):
+        organization = _organization_backend.authenticate(request, username=email, password=password)
+    if organization is not None:
+        organization.backend = _backend_path(_organization_backend)
+    return organization
+
+
+def authenticate_employee(request, email, password):
+    """Check employee credentials with EmployeeSignupBackend only. Raises HashingBusy."""
+    with hashing_gate.slot('employee'):
+        employee = _employee_backend.authenticate(request, email=email, password=password)
+    if employee is not None:
+        employee.backend = _backend_path(_employee_backend)
+    return employee
@@ -0,0 +1,139 @@
+import math
+import random
+import time
+from calendar import monthrange
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from Home.models import AttendanceRecord, EmployeeSignup
+from Home.utils import get_collection
+
+# Synthetic rows use negative primary keys so they never collide with real data
+# and can be removed with a single range delete.
+SYNTHETIC_ID_FILTER = {'id': {'$lt': 0}}
+INSERT_BATCH = 10000
+
+
+class Command(BaseCommand):
+    help = ("Benchmark AttendanceRecord.get_monthly_report ($group aggregation) against the ORM baseline, "
+            "which fetches the month's rows with a date-range filter and counts them in Python. "
+            "Seeds synthetic rows into --database, which should be a throwaway database "
+            "(BENCHMARK_DB_NAME in settings adds a 'benchmark' alias)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help="Number of attendance records to seed for each run")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per implementation")
+        parser.add_argument('--year', type=int, default=2000)
+        parser.add_argument('--month', type=int, default=1)
+        parser.add_argument('--skip-orm-above', type=int, default=None,
+                            help="Do not time the ORM baseline for sizes larger than this")
+        parser.add_argument('--database', required=True,
+                            help="Database alias to seed and benchmark, e.g. 'benchmark'")
+        parser.add_argument('--force', action='store_true',
+                            help=f"Allow --database {DEFAULT_DB_ALIAS} (seeds the live database)")
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if not 1 <= month <= 12:
+            raise CommandError('--month must be between 1 and 12')
+        using = options['database']
+        if using not in settings.DATABASES:
+            raise CommandError(f"Unknown database alias '{using}' (set BENCHMARK_DB_NAME to add 'benchmark')")
+        if self.is_live(using) and not options['force']:
+            raise CommandError(
+                f"'{using}' is the application database; the benchmark seeds up to "
+                f"{max(options['sizes'])} rows into it. Use a throwaway alias or pass --force"
+            )
+
+        employees = get_collection(EmployeeSignup, using)
+        records = get_collection(AttendanceRecord, using)
+        self.cleanup(employees, records)
+
+        self.stdout.write("orm+py: date-range find, counted in Python; $group: counted in MongoDB")
+        self.stdout.write(f"{'records':>10} {'orm+py (s)':>10} {'$group (s)':>11} {'speedup':>8}  match")
+        try:
+            for size in options['sizes']:
+                self.seed(employees, records, size, year, month)
+
+                skip_orm = options['skip_orm_above'] is not None and size > options['skip_orm_above']
+                orm_time, orm_report = (None, None) if skip_orm else self.time_it(
+                    AttendanceRecord.get_monthly_report_orm, year, month, options['repeat'], using
+                )
+                agg_time, agg_report = self.time_it(
+                    AttendanceRecord.get_monthly_report, year, month, options['repeat'], using
+                )
+
+                if orm_time is None:
+                    self.stdout.write(f"{size:>10} {'-':>10} {agg_time:>11.3f} {'-':>8}  -")
+                else:
+                    self.stdout.write(
+                        f"{size:>10} {orm_time:>10.3f} {agg_time:>11.3f} "
+                        f"{orm_time / agg_time:>7.1f}x  {'yes' if orm_report == agg_report else 'NO'}"
+                    )
+                self.cleanup(employees, records)
+        finally:
+            self.cleanup(employees, records)
+
+    def seed(self, employees, records, size, year, month):
+        """Insert `size` records spread over one row per employee per day of the month."""
+        days = monthrange(year, month)[1]
+        employee_count = math.ceil(size / days)
+        employees.insert_many([
+            {
+                'id': -(index + 1),
+                'unique_id': f'bench-{index}',
+                'rfid': f'bench-{index}',
+                'name': f'Benchmark Employee {index}',
+                'email': f'bench-{index}@example.invalid',
+                'date_joined': datetime(year, month, 1),
+                'organization_id': None,
+                'photo': '',
+                'is_active': True,
+                'is_staff': False,
+            }
+            for index in range(employee_count)
+        ])
+
+        batch = []
+        for index in range(size):
+            batch.append({
+                'id': -(index + 1),
+                'employee_id': -(index // days + 1),
+                'date': datetime(year, month, index % days + 1),
+                'check_in': None,
+                'check_out': None,
+                'status': random.choice('PPPPALH'),
+            })
+            if len(batch) == INSERT_BATCH:
+                records.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            records.insert_many(batch, ordered=False)
+
+    @staticmethod
+    def is_live(using):
+        """The default alias, or any alias pointing at the same database as it."""
+        default = settings.DATABASES[DEFAULT_DB_ALIAS]
+        database = settings.DATABASES[using]
+        return using == DEFAULT_DB_ALIAS or (
+            database['NAME'] == default['NAME']
+            and database.get('CLIENT', {}).get('host') == default.get('CLIENT', {}).get('host')
+        )
+
+    def time_it(self, report, year, month, repeat, using):
+        best = None
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = report(year, month, using=using)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def cleanup(self, employees, records):
+        records.delete_many(SYNTHETIC_ID_FILTER)
+        employees.delete_many(SYNTHETIC_ID_FILTER)
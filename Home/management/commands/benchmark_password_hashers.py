@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+
+from Home.hashers import HASHERS, PBKDF2_BY_ROLE, ROLES, preferred_hasher
+
+SAMPLE_PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = "Measure password verify latency for each configured hasher (and optional PBKDF2 iteration counts)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Verifications timed per hasher")
+        parser.add_argument('--pbkdf2-iterations', type=int, nargs='*', default=[],
+                            help="Extra PBKDF2 iteration counts to compare, e.g. 100000 260000")
+
+    def candidates(self, options):
+        hashers = [(f'pbkdf2 ({role}, {cls.iterations} it.)', cls()) for role, cls in PBKDF2_BY_ROLE.items()]
+        for iterations in options['pbkdf2_iterations']:
+            hasher = PBKDF2PasswordHasher()
+            hasher.iterations = iterations
+            hashers.append((f'pbkdf2 ({iterations} it.)', hasher))
+        for name, cls in HASHERS.items():
+            hashers.append((name, cls()))
+        return hashers
+
+    def handle(self, *args, **options):
+        policy = ', '.join(f'{role}={type(preferred_hasher(role)).__name__}' for role in ROLES)
+        self.stdout.write(f'Current policy: {policy}')
+        self.stdout.write(f"{'hasher':<34} {'mean ms':>9} {'p95 ms':>9} {'verify/s':>9}")
+
+        for label, hasher in self.candidates(options):
+            try:
+                encoded = hasher.encode(SAMPLE_PASSWORD, hasher.salt())
+            except ValueError as e:
+                # Optional library (argon2-cffi, bcrypt) not installed
+                self.stdout.write(f'{label:<34} skipped: {e}')
+                continue
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                hasher.verify(SAMPLE_PASSWORD, encoded)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            mean = statistics.mean(timings)
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f'{label:<34} {mean:>9.2f} {p95:>9.2f} {1000 / mean:>9.1f}')
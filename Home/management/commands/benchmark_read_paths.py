@@ -0,0 +1,76 @@
+import time
+from calendar import monthrange
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Home import repository
+from Home.models import Attendance, EmployeeSignup, Organization
+
+
+class Command(BaseCommand):
+    help = "Compare the native pymongo read paths (Home/repository.py) with their ORM equivalents"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, help="Organization id (default: the one with most employees)")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed runs per read path")
+        parser.add_argument('--year', type=int, help="Month for the monthly range (default: current)")
+        parser.add_argument('--month', type=int)
+
+    def time_it(self, function, repeat):
+        function()  # warm-up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = function()
+        return (time.perf_counter() - started) / repeat * 1000, result
+
+    def handle(self, *args, **options):
+        org_id = options['org'] or self.busiest_organization()
+        if org_id is None:
+            raise CommandError('No organization with employees to benchmark against')
+        today = timezone.now().date()
+        year, month = options['year'] or today.year, options['month'] or today.month
+        start, end = date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+        employee_ids = [row['id'] for row in repository.employee_rows(org_id, fields=('id',))]
+        card = EmployeeSignup.objects.filter(organization_id=org_id).exclude(rfid=None).values_list('rfid', flat=True).first()
+
+        paths = [
+            ('employee list',
+             lambda: list(EmployeeSignup.objects.filter(organization_id=org_id).order_by('name', 'id').values('id', 'unique_id', 'name')),
+             lambda: repository.employee_rows(org_id)),
+            ('attendance today',
+             lambda: list(Attendance.objects.filter(employee_id__in=employee_ids, date=today)),
+             lambda: repository.attendance_today(org_id)),
+            ('monthly range',
+             lambda: list(Attendance.objects.filter(employee_id__in=employee_ids, date__range=[start, end])),
+             lambda: repository.attendance_range(employee_ids, start, end)),
+        ]
+        if card:
+            key = card.strip().lower()
+            paths.insert(0, (
+                'rfid lookup',
+                lambda: EmployeeSignup.objects.select_related('organization').filter(rfid__iexact=key).first(),
+                lambda: repository.employee_by_rfid(key),
+            ))
+
+        self.stdout.write(f'Organization {org_id}, {len(employee_ids)} employee(s), {options["repeat"]} run(s) per path')
+        self.stdout.write(f"{'read path':<18} {'orm ms':>9} {'native ms':>10} {'speedup':>8}  rows")
+        for label, orm, native in paths:
+            orm_ms, orm_result = self.time_it(orm, options['repeat'])
+            native_ms, native_result = self.time_it(native, options['repeat'])
+            rows = len(native_result) if isinstance(native_result, list) else int(native_result is not None)
+            expected = len(orm_result) if isinstance(orm_result, list) else int(orm_result is not None)
+            self.stdout.write(
+                f'{label:<18} {orm_ms:>9.2f} {native_ms:>10.2f} {orm_ms / native_ms:>7.1f}x  '
+                f"{rows}{'' if rows == expected else f' (orm: {expected})'}"
+            )
+
+    def busiest_organization(self):
+        counts = {}
+        for org_id in EmployeeSignup.objects.values_list('organization_id', flat=True):
+            counts[org_id] = counts.get(org_id, 0) + 1
+        if counts:
+            return max(counts, key=counts.get)
+        return Organization.objects.values_list('id', flat=True).first()
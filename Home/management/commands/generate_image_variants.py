@@ -0,0 +1,59 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from Home.image_worker import IMAGE_FIELDS, image_worker
+from Home.images import generate_variants, variant_sizes
+from Home.models import EmployeeSignup, Organization
+
+
+class Command(BaseCommand):
+    help = "Create resized variants of employee photos and organization logos that do not have them yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['photos', 'logos'], help="Process only photos or only logos")
+        parser.add_argument('--force', action='store_true', help="Re-create variants that already exist")
+        parser.add_argument('--reprocess', action='store_true',
+                            help="Run the full validate-and-resize job on the image worker pool and update the status field")
+        parser.add_argument('--status', action='append', choices=['pending', 'processing', 'ready', 'failed'],
+                            help="With --reprocess, only images in this status (repeatable); default all")
+
+    def handle(self, *args, **options):
+        models = []
+        if options['only'] != 'logos':
+            models.append(EmployeeSignup)
+        if options['only'] != 'photos':
+            models.append(Organization)
+
+        if options['reprocess']:
+            self.reprocess(models, options)
+            return
+
+        written = failed = 0
+        for model in models:
+            field, _, crop = IMAGE_FIELDS[model]
+            for obj in model.objects.exclude(**{field: ''}).exclude(**{field: None}).only('id', field).iterator():
+                field_file = getattr(obj, field)
+                try:
+                    written += len(generate_variants(field_file, crop=crop, overwrite=options['force']))
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{field_file.name}: {str(e)}')
+
+        sizes = ', '.join(str(size) for size in variant_sizes())
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} variant(s) ({sizes} px); {failed} image(s) failed.'))
+
+    def reprocess(self, models, options):
+        futures = []
+        for model in models:
+            field, status_field, _ = IMAGE_FIELDS[model]
+            queryset = model.objects.exclude(**{field: ''}).exclude(**{field: None})
+            if options['status']:
+                queryset = queryset.filter(**{f'{status_field}__in': options['status']})
+            for obj in queryset.only('id').iterator():
+                futures.append(image_worker.submit(obj, overwrite=options['force']))
+
+        statuses = Counter(future.result() for future in futures)
+        image_worker.shutdown()
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(statuses.items(), key=str)) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Reprocessed {len(futures)} image(s): {summary}.'))
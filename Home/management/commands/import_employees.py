@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Home.bulk_import import BulkImportError, import_employees
+from Home.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Import employees for an organization from a CSV file and an optional ZIP of photos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv', help="CSV with name, email, password, unique_id and optional rfid, photo columns")
+        parser.add_argument('--org', type=int, required=True, help="Organization id")
+        parser.add_argument('--photos', help="ZIP of photos (named by the photo column or <unique_id>.<ext>)")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default BULK_IMPORT_HASH_WORKERS)")
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(pk=options['org'])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization {options['org']} does not exist")
+
+        photos = open(options['photos'], 'rb') if options['photos'] else None
+        try:
+            with open(options['csv'], 'rb') as csv_file:
+                report = import_employees(organization, csv_file, photos_file=photos,
+                                          dry_run=options['dry_run'], workers=options['workers'])
+        except BulkImportError as e:
+            raise CommandError(str(e))
+        finally:
+            if photos is not None:
+                photos.close()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {'; '.join(error['errors'])}")
+        timings = ', '.join(f'{name} {seconds}s' for name, seconds in report['timings'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} row(s): {report['created']} created, {report['failed']} failed"
+            f"{' (dry run)' if report['dry_run'] else ''} in {report['seconds']}s"
+            f" ({report['rows_per_second']} rows/s; {timings})."
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Home.cache import is_shared
+from Home.counters import refresh_stats
+from Home.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached organization dashboard counters from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org', type=int, action='append', help="Organization id (repeatable); default all")
+
+    def handle(self, *args, **options):
+        if not is_shared():
+            # This process's locmem cache is not the one the web workers read
+            raise CommandError(
+                "CACHES['default'] is not shared between processes (CACHE_BACKEND=locmem); "
+                "set CACHE_BACKEND to file or redis. Without a shared cache the dashboard "
+                "counts from the database and there is nothing to reconcile."
+            )
+        org_ids = options['org'] or Organization.objects.values_list('id', flat=True)
+        count = 0
+        for org_id in org_ids:
+            refresh_stats(org_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Reconciled dashboard counters for {count} organization(s).'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from Home.tap_queue import STALE_CLAIM_SECONDS, tap_queue
+
+
+class Command(BaseCommand):
+    help = "Drain the RFID write-behind journal into Attendance (crash recovery)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Taps written per bulk upsert")
+        parser.add_argument('--stale-after', type=int, default=STALE_CLAIM_SECONDS,
+                            help="Only take back claims older than this many seconds; younger ones "
+                                 "may belong to a web worker that is still writing them")
+
+    def handle(self, *args, **options):
+        released = tap_queue.release_claims(older_than=options['stale_after'])
+        if released:
+            self.stdout.write(f'Released {released} tap(s) claimed by a stopped worker.')
+        replayed = tap_queue.flush(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {replayed} tap(s); {tap_queue.depth()} left in {tap_queue.path}.'
+        ))
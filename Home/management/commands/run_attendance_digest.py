@@ -0,0 +1,109 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Home.notifications import (
+    acquire_digest_lock,
+    digest_claimed,
+    fire_time,
+    release_digest_lock,
+    send_attendance_digest,
+)
+
+logger = logging.getLogger(__name__)
+
+# Re-check the clock at least this often while waiting (seconds)
+MAX_SLEEP = 300
+
+# Backoff between attempts when a digest run fails (seconds); doubles up to the cap
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 1800
+
+
+class Command(BaseCommand):
+    help = "Run the daily attendance email digest worker (sleeps until ATTENDANCE_EMAIL_SEND_TIME)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send today's digest now and exit")
+
+    def handle(self, *args, **options):
+        # Days whose lock we still hold after a failed run because releasing it failed too
+        self.unreleased = set()
+        if options['once']:
+            self.run_digest(timezone.localdate())
+            return
+
+        day = self.first_due_day()
+        while True:
+            fire_at = fire_time(day)
+            self.stdout.write(f'Next attendance digest at {fire_at:%Y-%m-%d %H:%M %Z}')
+            self.sleep_until(fire_at)
+            self.deliver(day)
+            day += timedelta(days=1)
+
+    def first_due_day(self):
+        """
+        Today if its digest is still outstanding - either not due yet, or due while this
+        worker was down and not claimed by anyone - otherwise tomorrow.
+        """
+        today = timezone.localdate()
+        if fire_time(today) > timezone.localtime():
+            return today
+        try:
+            if not digest_claimed(today):
+                self.stdout.write(f'Digest for {today} was missed, sending it now.')
+                return today
+        except Exception:
+            # Can't tell; try anyway - the lock still keeps it to one send
+            logger.exception(f'Could not check the digest lock for {today}')
+            return today
+        return today + timedelta(days=1)
+
+    def sleep_until(self, moment):
+        # Sleep in bounded steps so clock adjustments cannot make us miss the slot
+        while True:
+            remaining = (moment - timezone.localtime()).total_seconds()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, MAX_SLEEP))
+
+    def deliver(self, day):
+        """
+        Run the digest for `day`, retrying with backoff until it is sent (here or by
+        another worker). Gives up only when the next day's slot comes round.
+        """
+        deadline = fire_time(day + timedelta(days=1))
+        delay = RETRY_DELAY
+        while True:
+            try:
+                self.run_digest(day)
+                return
+            except Exception:
+                logger.exception(f'Attendance digest for {day} failed; retrying in {delay}s')
+            if timezone.localtime() + timedelta(seconds=delay) >= deadline:
+                logger.error(f'Giving up on the attendance digest for {day}')
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def run_digest(self, day):
+        if day in self.unreleased:
+            release_digest_lock(day)
+            self.unreleased.discard(day)
+        if not acquire_digest_lock(day):
+            self.stdout.write(f'Digest for {day} already claimed by another worker, skipping.')
+            return
+        try:
+            sent = send_attendance_digest(day)
+        except Exception:
+            # Let another worker (or our own retry) pick the day up again
+            try:
+                release_digest_lock(day)
+            except Exception:
+                logger.exception(f'Could not release the digest lock for {day}')
+                self.unreleased.add(day)
+            raise
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} attendance digest(s) for {day}.'))
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from pymongo.errors import OperationFailure
+
+from Home.mongo_indexes import (
+    QUERY_SHAPES, app_models, create_index, drop_index, explain_shape, index_name, index_plan,
+)
+from Home.utils import get_collection
+
+
+def describe(keys):
+    return '(' + ', '.join(column if direction == 1 else f'{column} desc' for column, direction in keys) + ')'
+
+
+class Command(BaseCommand):
+    help = ("Create the MongoDB indexes the models and hot query shapes need (Home/mongo_indexes.py) "
+            "and report which query shapes still do a COLLSCAN")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+        parser.add_argument('--drop', action='store_true',
+                            help="Also drop indexes nothing requires and rebuild ones with the wrong options")
+        parser.add_argument('--no-explain', action='store_true', help="Skip the explain() report")
+
+    def handle(self, *args, **options):
+        dry_run, drop = options['dry_run'], options['drop']
+        created = dropped = failed = 0
+
+        for model in app_models():
+            collection = get_collection(model).name
+            missing, conflicting, extra = index_plan(model)
+
+            for info in extra:
+                if not drop:
+                    self.stdout.write(f'{collection}: {info["name"]} is not required (kept; --drop removes it)')
+                    continue
+                self.stdout.write(f'{collection}: drop {info["name"]}')
+                if not dry_run:
+                    drop_index(model, info['name'])
+                dropped += 1
+
+            for keys, spec, info in conflicting:
+                if not drop:
+                    self.stdout.write(self.style.WARNING(
+                        f'{collection}: {info["name"]} on {describe(keys)} has other options than required '
+                        f'(unique={spec["unique"]}, partial={spec["partial"]}); --drop rebuilds it'
+                    ))
+                    continue
+                self.stdout.write(f'{collection}: rebuild {info["name"]} on {describe(keys)}')
+                if not dry_run:
+                    drop_index(model, info['name'])
+                dropped += 1
+                missing.append((keys, spec))
+
+            for keys, spec in missing:
+                unique = ' unique' if spec['unique'] else ''
+                self.stdout.write(
+                    f'{collection}: create{unique} {index_name(keys, spec)} on {describe(keys)} '
+                    f'for {"; ".join(spec["reasons"])}'
+                )
+                if dry_run:
+                    created += 1
+                    continue
+                try:
+                    create_index(model, keys, spec)
+                    created += 1
+                except OperationFailure as e:
+                    # e.g. duplicate values under a new unique index
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f'{collection}: could not create {describe(keys)}: {e}'))
+
+        verb = 'Would create' if dry_run else 'Created'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {created} index(es), dropped {dropped}, {failed} failed.'))
+
+        if not options['no_explain']:
+            self.explain_report()
+
+    def explain_report(self):
+        self.stdout.write(f"{'query shape':<40} {'plan':<28} {'index':<32} examined/returned")
+        for shape in QUERY_SHAPES:
+            result = explain_shape(shape)
+            if result is None:
+                self.stdout.write(f"{shape['label']:<40} (no documents to sample)")
+                continue
+            line = (f"{result['label']:<40} {' > '.join(result['stages']):<28} {result['index'] or '-':<32} "
+                    f"{result['examined']}/{result['returned']}")
+            self.stdout.write(self.style.WARNING(line + '  COLLSCAN') if result['collscan'] else line)
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0005_employeesignup_photo_status_organization_logo_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeesignup',
+            name='password',
+            field=models.CharField(default='', max_length=128),
+        ),
+    ]
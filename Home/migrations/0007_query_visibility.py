@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0006_employeesignup_password'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='query',
+            name='visibility',
+            field=models.CharField(choices=[('public', 'Public'), ('private', 'Private')], default='private', max_length=10),
+        ),
+    ]
@@ -1,7 +1,6 @@
 import uuid
 from django.db import models
 from django.core.validators import EmailValidator
-from django.contrib.auth.hashers import make_password, check_password
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -10,18 +9,25 @@ from django.contrib.auth.models import (
     Permission,
     AbstractUser,
 )
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from djongo import models  # Djongo’s model imports
+from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 from bson import ObjectId  # ensure you have pymongo installed
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from Backend.db_operations import DateRangeManager, DateRangeQuerySet
+from .utils import get_collection, model_from_document
+from .hashers import hash_password, verify_password
+from .counters import ATTENDANCE_TODAY, increment as increment_counter
 
 # Function to generate a unique 12-character ID
 def generate_uuid():
     return uuid.uuid4().hex[:12]
 
 # Organization Manager
-class OrganizationManager(BaseUserManager):
+class OrganizationManager(BaseUserManager.from_queryset(DateRangeQuerySet)):
     def create_user(self, name, email, password=None):
         if not email:
             raise ValueError("The Email field must be set")
@@ -39,12 +45,21 @@ class OrganizationManager(BaseUserManager):
         org.save(using=self._db)
         return org
 
+# Processing state of an uploaded photo or logo (see Home/image_worker.py)
+IMAGE_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('processing', 'Processing'),
+    ('ready', 'Ready'),
+    ('failed', 'Failed'),
+]
+
 # Organization Model
 class Organization(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     email = models.EmailField(unique=True, validators=[EmailValidator()])
     password = models.CharField(max_length=255)
     logo = models.ImageField(upload_to='logos/', null=True, blank=True)
+    logo_status = models.CharField(max_length=20, choices=IMAGE_STATUS_CHOICES, default='ready')
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -58,16 +73,20 @@ class Organization(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['name']
 
     def set_password(self, raw_password):
-        self.password = make_password(raw_password)
+        self.password = hash_password(raw_password, 'organization')
        
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        def setter(raw_password):
+            # Re-hash with the current policy after a successful login
+            self.set_password(raw_password)
+            self.save(update_fields=['password'])
+        return verify_password(raw_password, self.password, 'organization', setter)
 
     def __str__(self):
         return self.name
 
 # Employee Manager
-class EmployeeSignupManager(BaseUserManager):
+class EmployeeSignupManager(BaseUserManager.from_queryset(DateRangeQuerySet)):
     def create_user(self, email, name, unique_id, password=None, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set")
@@ -98,9 +117,11 @@ class EmployeeSignup(models.Model):
     rfid = models.CharField(max_length=50, null=True, blank=True, unique=True)
     name = models.CharField(max_length=255)
     email = models.EmailField(unique=True, validators=[EmailValidator()])
+    password = models.CharField(max_length=128, default='')
     date_joined = models.DateTimeField(auto_now_add=True)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='employees')
     photo = models.ImageField(upload_to='employees_photos/', null=True, blank=True)
+    photo_status = models.CharField(max_length=20, choices=IMAGE_STATUS_CHOICES, default='ready')
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
@@ -112,6 +133,41 @@ class EmployeeSignup(models.Model):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name', 'unique_id']  # Include unique_id as required
 
+    # Fields that decide which employee a card resolves to (Home/signals.py)
+    CARD_FIELDS = ('rfid', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The card fields as loaded, so a save can tell whether they changed
+        instance._loaded_card = {name: instance.__dict__[name] for name in cls.CARD_FIELDS if name in instance.__dict__}
+        return instance
+
+    def card_changes(self):
+        """
+        The card UIDs whose RFID index entries this instance's last save made
+        stale (old and new rfid), or an empty set if rfid and is_active did not
+        change. Loaded values are reset, so each change is reported once.
+        """
+        loaded = getattr(self, '_loaded_card', {})
+        # Deferred fields were neither loaded nor saved
+        current = {name: self.__dict__[name] for name in self.CARD_FIELDS if name in self.__dict__}
+        if all(name in loaded and loaded[name] == value for name, value in current.items()):
+            return set()
+        self._loaded_card = dict(loaded, **current)
+        return {card for card in (loaded.get('rfid'), current.get('rfid')) if card}
+
+    def set_password(self, raw_password):
+        self.password = hash_password(raw_password, 'employee')
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            # Re-hash with the current policy after a successful login. update() skips the
+            # post_save receivers: a new hash does not affect the RFID index or cached lists.
+            self.set_password(raw_password)
+            type(self).objects.filter(pk=self.pk).update(password=self.password)
+        return verify_password(raw_password, self.password, 'employee', setter)
+
     @classmethod
     def find_by_rfid(cls, card_uid):
         """
@@ -134,14 +190,22 @@ class Query(models.Model):
         ('resolved', 'Resolved'),
         ('in_progress', 'In Progress'),
     ]
+    VISIBILITY_CHOICES = [
+        ('public', 'Public'),
+        ('private', 'Private'),
+    ]
 
     subject = models.CharField(max_length=200)
     description = models.TextField()
     organization = models.ForeignKey('Organization', on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Only public queries are listed by get_public_queries
+    visibility = models.CharField(max_length=10, choices=VISIBILITY_CHOICES, default='private')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DateRangeManager()
+
     class Meta:
         verbose_name_plural = "Queries"
         ordering = ['-created_at']
@@ -154,6 +218,8 @@ class RFIDCard(models.Model):
     card_uid = models.CharField(max_length=50, unique=True)
     scanned_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DateRangeManager()
+
     def __str__(self):
         return f"Card UID: {self.card_uid} - Scanned at {self.scanned_at}"
 
@@ -163,6 +229,11 @@ def today_date():
     return timezone.now().date()
 
 
+def mongo_date(value):
+    """Return a date the way djongo stores DateField values (naive midnight datetime)."""
+    return datetime(value.year, value.month, value.day)
+
+
 # Attendance Model
 class Attendance(models.Model):
     """
@@ -193,6 +264,8 @@ class Attendance(models.Model):
         default='A'
     )
 
+    objects = DateRangeManager()
+
     class Meta:
         unique_together = ('employee', 'date')
         indexes = [
@@ -200,13 +273,19 @@ class Attendance(models.Model):
         ]
 
     @classmethod
-    def mark_attendance(cls, employee, status='P', check_time=None):
+    def mark_attendance(cls, employee, status='P', check_time=None, atomic=None):
         """
         Creates or updates today's attendance record for the employee.
         Records the employee's unique id, organization name, check_in time, and status.
+        With `atomic` (defaults to settings.ATTENDANCE_ATOMIC_UPSERT) the record is
+        written with a single find-and-modify upsert instead of get_or_create + save().
         """
         if not check_time:
             check_time = timezone.now()
+        if atomic is None:
+            atomic = getattr(settings, 'ATTENDANCE_ATOMIC_UPSERT', False)
+        if atomic:
+            return cls._mark_attendance_atomic(employee, status, check_time)
         today = check_time.date()
 
         # Attempt to retrieve an existing attendance record or create a new one
@@ -225,8 +304,147 @@ class Attendance(models.Model):
             attendance.check_out = check_time
             attendance.status = status
             attendance.save()
+        else:
+            increment_counter(employee.organization_id, ATTENDANCE_TODAY, day=today)
+        return attendance, created
+
+    @classmethod
+    def _mark_attendance_atomic(cls, employee, status, check_time):
+        """
+        One round trip version of mark_attendance.
+        A pipeline update lets a single upsert act like $setOnInsert for check_in,
+        employee_unique_id and organization_name, and like $set for check_out and
+        status on later taps, so two readers racing on the same employee cannot
+        trip over the (employee, date) unique index.
+        """
+        # Use the organization already loaded with the employee (the RFID index does this)
+        if employee._meta.get_field('organization').is_cached(employee):
+            organization_name = employee.organization.name
+        else:
+            organization_name = (
+                Organization.objects.filter(pk=employee.organization_id).values_list('name', flat=True).first() or ""
+            )
+
+        # Existing records always carry a status, freshly upserted ones do not yet
+        is_new = {'$eq': [{'$type': '$status'}, 'missing']}
+        document = get_collection(cls).find_one_and_update(
+            {'employee_id': employee.pk, 'date': mongo_date(check_time.date())},
+            [{'$set': {
+                'check_in': {'$cond': [is_new, check_time, '$check_in']},
+                'check_out': {'$cond': [is_new, None, check_time]},
+                'employee_unique_id': {'$cond': [is_new, {'$literal': employee.unique_id}, '$employee_unique_id']},
+                'organization_name': {'$cond': [is_new, {'$literal': organization_name}, '$organization_name']},
+                'status': {'$literal': status},
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        # Only a first tap of the day leaves check_out empty
+        created = document.get('check_out') is None
+        if created:
+            increment_counter(employee.organization_id, ATTENDANCE_TODAY, day=check_time.date())
+        attendance = cls._from_document(document)
+        attendance.employee = employee
         return attendance, created
 
+    @classmethod
+    def _from_document(cls, document):
+        """Build an Attendance instance from a raw collection document."""
+        return model_from_document(cls, document)
+
+    @staticmethod
+    def _check_out_update(record_filter, last_time, status):
+        """
+        Check-out for an existing record. check_out only moves forward, and a tap no
+        later than check_in is the check-in tap itself (replayed from the RFID
+        journal after a crash), so it leaves the record alone instead of recording
+        a zero-length visit.
+        """
+        return UpdateOne(
+            dict(record_filter, check_in={'$lt': last_time}),
+            {'$set': {'status': status}, '$max': {'check_out': last_time}},
+        )
+
+    @classmethod
+    def bulk_mark_attendance(cls, taps, status='P'):
+        """
+        Records many (employee, check_time) taps with one read and one bulk upsert.
+        Keeps the meaning of mark_attendance: the first tap of the day is the check-in,
+        every later tap is a check-out. Returns the `created` flag for each tap, in order.
+        """
+        created_flags = [False] * len(taps)
+        if not taps:
+            return created_flags
+
+        # Group taps per (employee, day), oldest first
+        groups = {}
+        for position, (employee, check_time) in enumerate(taps):
+            groups.setdefault((employee.pk, check_time.date()), []).append((check_time, position, employee))
+
+        collection = get_collection(cls)
+
+        # One query to learn which (employee, day) records already exist
+        existing = set()
+        for doc in collection.find(
+            {
+                'employee_id': {'$in': list({employee_id for employee_id, _ in groups})},
+                'date': {'$in': [mongo_date(day) for day in {day for _, day in groups}]},
+            },
+            {'employee_id': 1, 'date': 1},
+        ):
+            existing.add((doc['employee_id'], doc['date'].date()))
+
+        operations = []
+        replays = []
+        for (employee_id, day), group in groups.items():
+            group.sort(key=lambda tap: tap[0])
+            first_time, first_position, employee = group[0]
+            last_time = group[-1][0]
+            record_filter = {'employee_id': employee_id, 'date': mongo_date(day)}
+            expected_new = (employee_id, day) not in existing
+
+            if expected_new:
+                update = {'$set': {'status': status}}
+                on_insert = {
+                    'check_in': first_time,
+                    'employee_unique_id': employee.unique_id,
+                    'organization_name': employee.organization.name if hasattr(employee, 'organization') else "",
+                }
+                if len(group) > 1:
+                    update['$max'] = {'check_out': last_time}
+                else:
+                    on_insert['check_out'] = None
+                update['$setOnInsert'] = on_insert
+                operations.append(UpdateOne(record_filter, update, upsert=True))
+            else:
+                operations.append(cls._check_out_update(record_filter, last_time, status))
+            replays.append((first_position, record_filter, last_time, expected_new))
+
+        try:
+            upserted = set(collection.bulk_write(operations, ordered=False).upserted_ids)
+        except BulkWriteError as exc:
+            # Another writer inserted the same (employee, date) first and the upsert hit the unique index
+            if any(error.get('code') != 11000 for error in exc.details.get('writeErrors', [])):
+                raise
+            upserted = {item['index'] for item in exc.details.get('upserted', [])}
+
+        # Only an upsert that actually inserted is a check-in. A record the read said
+        # was new may have been inserted by another writer since: the upsert then
+        # matched it (or failed on the unique index) and every one of its taps,
+        # including a lone first tap that only had $setOnInsert, is a check-out.
+        retries = []
+        for index, (first_position, record_filter, last_time, expected_new) in enumerate(replays):
+            created_flags[first_position] = index in upserted
+            if expected_new and index not in upserted:
+                retries.append(cls._check_out_update(record_filter, last_time, status))
+        if retries:
+            collection.bulk_write(retries, ordered=False)
+
+        for (employee, check_time), created in zip(taps, created_flags):
+            if created:
+                increment_counter(employee.organization_id, ATTENDANCE_TODAY, day=check_time.date())
+        return created_flags
+
     def __str__(self):
         return f"{self.employee.name} - {self.date} - {self.get_status_display()}"
 
@@ -254,7 +472,9 @@ class AttendanceRecord(models.Model):
         ],
         default='A'
     )
-    
+
+    objects = DateRangeManager()
+
     class Meta:
         indexes = [
             models.Index(fields=['employee', 'date']),
@@ -304,10 +524,57 @@ class AttendanceRecord(models.Model):
             })
         return attendance_list
 
+    # Status code -> counter name in get_monthly_report
+    REPORT_COUNTERS = {
+        'P': 'present',
+        'A': 'absent',
+        'L': 'leave',
+        'H': 'half_day',
+    }
+
     @classmethod
-    def get_monthly_report(cls, year, month, employee=None):
+    def get_monthly_report(cls, year, month, employee=None, using=None):
         """
         Generate monthly attendance report.
+        Counts are computed by a $group aggregation over an indexed `date` range,
+        so only one row per employee leaves the database. `using` picks the
+        database alias (the router's choice by default).
+        """
+        start = date(year, month, 1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        match = {'date': {'$gte': mongo_date(start), '$lt': mongo_date(end)}}
+        if employee:
+            match['employee_id'] = getattr(employee, 'pk', employee)
+
+        group = {'_id': '$employee_id'}
+        for code, counter in cls.REPORT_COUNTERS.items():
+            group[counter] = {'$sum': {'$cond': [{'$eq': ['$status', code]}, 1, 0]}}
+        pipeline = [{'$match': match}, {'$group': group}]
+        counts = list(get_collection(cls, using).aggregate(pipeline))
+
+        employees = {
+            employee_id: (unique_id, name)
+            for employee_id, unique_id, name in EmployeeSignup.objects.using(using).filter(
+                id__in=[row['_id'] for row in counts]
+            ).values_list('id', 'unique_id', 'name')
+        }
+        report = {}
+        for row in counts:
+            if row['_id'] not in employees:
+                continue
+            emp_id, name = employees[row['_id']]
+            report[emp_id] = {'name': name}
+            for counter in cls.REPORT_COUNTERS.values():
+                report[emp_id][counter] = row[counter]
+        return report
+
+    @classmethod
+    def get_monthly_report_orm(cls, year, month, employee=None, using=None):
+        """
+        Generate monthly attendance report by counting rows in Python.
+        Kept as the baseline for benchmark_monthly_report. The year/month lookups
+        are rewritten to a date range by DateRangeQuerySet, so this measures a
+        range find plus Python counting, not an EXTRACT query.
         """
         query = {
             'date__year': year,
@@ -315,7 +582,7 @@ class AttendanceRecord(models.Model):
         }
         if employee:
             query['employee'] = employee
-        records = cls.objects.filter(**query).select_related('employee')
+        records = cls.objects.using(using).filter(**query).select_related('employee')
         report = {}
         for record in records:
             emp_id = record.employee.unique_id
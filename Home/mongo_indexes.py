@@ -0,0 +1,265 @@
+"""
+The MongoDB indexes the application needs, and how the hot queries use them.
+
+djongo creates indexes from migrations (primary keys, unique fields,
+unique_together, Meta.indexes, foreign keys) but nothing checks that they exist
+on a given database, and the query shapes the views depend on are not all
+declared on the models. required_indexes() works out the full set from the
+models plus QUERY_SHAPES, index_plan() compares it with what a collection has,
+and explain_shape() shows which plan a query of each shape actually gets.
+
+`python manage.py sync_mongo_indexes` applies all of it.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import models
+
+from .utils import get_collection
+
+# Query shapes behind the slow paths. `equals` fields are matched exactly, `in`
+# with $in, `range` with a $gte/$lt range; `keys` is the index that serves them.
+QUERY_SHAPES = [
+    {
+        'label': 'employee list (manage_employees)',
+        'model': 'EmployeeSignup',
+        'keys': [('organization', 1), ('name', 1), ('id', 1)],
+        'equals': ['organization'],
+        'sort': [('name', 1), ('id', 1)],
+    },
+    {
+        'label': 'rfid lookup',
+        'model': 'EmployeeSignup',
+        'keys': [('rfid', 1)],
+        'equals': ['rfid'],
+    },
+    {
+        'label': 'attendance of an employee on a day',
+        'model': 'Attendance',
+        'keys': [('employee', 1), ('date', 1)],
+        'equals': ['employee', 'date'],
+    },
+    {
+        'label': 'attendance date range (grid, export)',
+        'model': 'Attendance',
+        'keys': [('employee', 1), ('date', 1)],
+        'in': ['employee'],
+        'range': 'date',
+    },
+    {
+        'label': 'attendance of a day (digest)',
+        'model': 'Attendance',
+        'keys': [('date', 1)],
+        'equals': ['date'],
+    },
+    {
+        'label': 'attendance range of all employees',
+        'model': 'Attendance',
+        'keys': [('date', 1)],
+        'range': 'date',
+    },
+    {
+        'label': 'monthly report',
+        'model': 'AttendanceRecord',
+        'keys': [('date', 1), ('status', 1)],
+        'range': 'date',
+    },
+    {
+        'label': 'organization queries, newest first',
+        'model': 'Query',
+        'keys': [('organization', 1), ('created_at', -1)],
+        'equals': ['organization'],
+        'sort': [('created_at', -1)],
+    },
+    {
+        'label': 'public queries, newest first',
+        'model': 'Query',
+        'keys': [('visibility', 1), ('created_at', -1), ('id', -1)],
+        'equals': ['visibility'],
+        'sort': [('created_at', -1), ('id', -1)],
+    },
+]
+
+# Width of the sample range explain_shape() queries (a monthly report)
+RANGE_SPAN = timedelta(days=31)
+
+# $type of the values a nullable unique field can hold; its unique index only
+# covers documents of that type, so any number of rows may leave it NULL.
+PARTIAL_TYPES = {
+    models.CharField: 'string',
+    models.IntegerField: 'number',
+}
+
+
+def _column(model, name):
+    return model._meta.get_field(name).column
+
+
+def _keys(model, fields):
+    """[('organization', 1), ...] or ['-created_at', ...] -> ((column, direction), ...)"""
+    keys = []
+    for field in fields:
+        if isinstance(field, tuple):
+            name, direction = field
+        else:
+            name, direction = field.lstrip('-'), -1 if field.startswith('-') else 1
+        keys.append((_column(model, name), direction))
+    return tuple(keys)
+
+
+def _partial_filter(field):
+    if not field.null:
+        return None
+    for field_class, bson_type in PARTIAL_TYPES.items():
+        if isinstance(field, field_class):
+            return {field.column: {'$type': bson_type}}
+    return None
+
+
+def app_models():
+    return [model for model in apps.get_app_config('Home').get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy]
+
+
+def required_indexes(model):
+    """
+    The indexes a model's collection needs, keyed by key tuple:
+    {keys: {'unique': bool, 'partial': dict or None, 'name': str or None, 'reasons': [...]}}
+    """
+    required = {}
+
+    def need(keys, reason, unique=False, partial=None, name=None):
+        spec = required.setdefault(keys, {'unique': False, 'partial': None, 'name': None, 'reasons': []})
+        if unique and not spec['unique']:
+            # A unique index serves every non-unique use of the same keys
+            spec.update(unique=True, partial=partial)
+        spec['name'] = spec['name'] or name
+        spec['reasons'].append(reason)
+
+    meta = model._meta
+    if meta.pk.column != '_id':
+        need(((meta.pk.column, 1),), 'primary key', unique=True, name='__primary_key__')
+    for field in meta.local_fields:
+        if field.primary_key:
+            continue
+        if field.unique:
+            need(((field.column, 1),), f'{field.name} unique', unique=True, partial=_partial_filter(field))
+        elif field.db_index:
+            need(((field.column, 1),), f'{field.name} db_index')
+    for fields in meta.unique_together:
+        need(_keys(model, fields), f"unique_together {', '.join(fields)}", unique=True)
+    for index in meta.indexes:
+        need(_keys(model, index.fields), f'Meta.indexes {index.name}', name=index.name)
+    for shape in QUERY_SHAPES:
+        if shape['model'] == model.__name__:
+            need(_keys(model, shape['keys']), shape['label'])
+    return required
+
+
+def existing_indexes(model):
+    """{keys: index_information() entry (plus its 'name')} for the model's collection, without _id_."""
+    existing = {}
+    for name, info in get_collection(model).index_information().items():
+        if name == '_id_':
+            continue
+        keys = tuple((column, int(direction)) for column, direction in info['key'])
+        existing[keys] = dict(info, name=name)
+    return existing
+
+
+def matches(spec, info):
+    return bool(info.get('unique')) == spec['unique'] and info.get('partialFilterExpression') == spec['partial']
+
+
+def index_plan(model):
+    """
+    (missing, conflicting, extra) for a model's collection: required (keys, spec)
+    pairs with no index, required (keys, spec, existing) pairs whose index has the
+    right keys but other options, and existing indexes nothing requires.
+    """
+    required = required_indexes(model)
+    existing = existing_indexes(model)
+    missing, conflicting = [], []
+    for keys, spec in required.items():
+        info = existing.get(keys)
+        if info is None:
+            missing.append((keys, spec))
+        elif not matches(spec, info):
+            conflicting.append((keys, spec, info))
+    extra = [info for keys, info in existing.items() if keys not in required]
+    return missing, conflicting, extra
+
+
+def index_name(keys, spec):
+    if spec['name']:
+        return spec['name']
+    return '_'.join(f'{column}_{direction}' for column, direction in keys)
+
+
+def create_index(model, keys, spec):
+    options = {'name': index_name(keys, spec)}
+    if spec['unique']:
+        options['unique'] = True
+    if spec['partial']:
+        options['partialFilterExpression'] = spec['partial']
+    return get_collection(model).create_index(list(keys), **options)
+
+
+def drop_index(model, name):
+    get_collection(model).drop_index(name)
+
+
+def _sample_filter(model, shape):
+    """A filter of the shape's form, with values taken from one stored document (None if empty)."""
+    fields = shape.get('equals', []) + shape.get('in', []) + ([shape['range']] if 'range' in shape else [])
+    columns = [_column(model, name) for name in fields]
+    document = get_collection(model).find_one(
+        {column: {'$ne': None} for column in columns}, {column: 1 for column in columns}
+    )
+    if document is None:
+        return None
+
+    query = {}
+    for name in shape.get('equals', []):
+        query[_column(model, name)] = document.get(_column(model, name))
+    for name in shape.get('in', []):
+        query[_column(model, name)] = {'$in': [document.get(_column(model, name))]}
+    if 'range' in shape:
+        column = _column(model, shape['range'])
+        query[column] = {'$gte': document.get(column), '$lt': document.get(column) + RANGE_SPAN}
+    return query
+
+
+def _stages(plan):
+    """Every stage (and index name) in a winning plan, outermost first."""
+    while plan:
+        yield plan.get('stage'), plan.get('indexName')
+        for child in plan.get('inputStages', []):
+            yield from _stages(child)
+        plan = plan.get('inputStage')
+
+
+def explain_shape(shape):
+    """
+    explain() a query of the shape: {'label', 'collscan', 'stages', 'index',
+    'examined', 'returned'}, or None when the collection has nothing to sample.
+    """
+    model = apps.get_model('Home', shape['model'])
+    query = _sample_filter(model, shape)
+    if query is None:
+        return None
+    cursor = get_collection(model).find(query)
+    if shape.get('sort'):
+        cursor = cursor.sort([(_column(model, name), direction) for name, direction in shape['sort']])
+    explanation = cursor.limit(50).explain()
+
+    stages = list(_stages(explanation['queryPlanner']['winningPlan']))
+    execution = explanation.get('executionStats', {})
+    return {
+        'label': shape['label'],
+        'collscan': any(stage == 'COLLSCAN' for stage, _ in stages),
+        'stages': [stage for stage, _ in stages],
+        'index': next((name for _, name in stages if name), None),
+        'examined': execution.get('totalDocsExamined'),
+        'returned': execution.get('nReturned'),
+    }
@@ -0,0 +1,178 @@
+import csv
+import io
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils.html import format_html, format_html_join
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+
+from .models import Attendance
+from .utils import get_database
+
+logger = logging.getLogger(__name__)
+
+# Raw collection holding one lock document per digest run
+DIGEST_LOCK_COLLECTION = 'Home_digestlock'
+
+
+def get_send_time():
+    """Return the configured local send time (settings.ATTENDANCE_EMAIL_SEND_TIME, "HH:MM")."""
+    return datetime.strptime(settings.ATTENDANCE_EMAIL_SEND_TIME, '%H:%M').time()
+
+
+def fire_time(day):
+    """Return the local datetime at which the digest for `day` is due."""
+    return timezone.make_aware(datetime.combine(day, get_send_time()))
+
+
+def next_fire_time(now=None):
+    """Return the next local datetime at which the attendance digest is due."""
+    now = timezone.localtime(now)
+    fire_at = fire_time(now.date())
+    if fire_at <= now:
+        fire_at = fire_time(now.date() + timedelta(days=1))
+    return fire_at
+
+
+def acquire_digest_lock(day):
+    """
+    Claim the digest for `day`. Only the first process to insert the lock document
+    wins, so the digest goes out exactly once however many workers are running.
+    """
+    try:
+        get_database()[DIGEST_LOCK_COLLECTION].insert_one({
+            '_id': f'attendance-digest:{day.isoformat()}',
+            'owner': f'{socket.gethostname()}:{os.getpid()}',
+            'acquired_at': timezone.now(),
+        })
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def digest_claimed(day):
+    """Return True if some worker already holds (or has sent) the digest for `day`."""
+    return get_database()[DIGEST_LOCK_COLLECTION].count_documents(
+        {'_id': f'attendance-digest:{day.isoformat()}'}, limit=1
+    ) > 0
+
+
+def release_digest_lock(day):
+    """Give up the claim for `day` so another run can retry it."""
+    get_database()[DIGEST_LOCK_COLLECTION].delete_one({'_id': f'attendance-digest:{day.isoformat()}'})
+
+
+DIGEST_COLUMNS = ['Employee ID', 'Name', 'Check In', 'Check Out', 'Status']
+
+
+def _format_time(value):
+    return timezone.localtime(value).strftime('%H:%M:%S') if value else 'N/A'
+
+
+def build_digest_message(organization, day, records, connection=None):
+    """Build one digest email for an organization: plain text, an HTML table and a CSV attachment."""
+    rows = [
+        [
+            record.employee.unique_id,
+            record.employee.name,
+            _format_time(record.check_in),
+            _format_time(record.check_out),
+            record.get_status_display(),
+        ]
+        for record in records
+    ]
+
+    text_body = "\n".join(
+        [f"Attendance for {organization.name} on {day:%Y-%m-%d} ({len(rows)} employees)", ""]
+        + [" | ".join(row) for row in rows]
+    )
+    html_body = format_html(
+        "<p>Attendance for {} on {} ({} employees)</p>"
+        "<table border=\"1\" cellpadding=\"4\" cellspacing=\"0\"><tr>{}</tr>{}</table>",
+        organization.name,
+        day.strftime('%Y-%m-%d'),
+        len(rows),
+        format_html_join('', '<th>{}</th>', ((column,) for column in DIGEST_COLUMNS)),
+        format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>', rows),
+    )
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(DIGEST_COLUMNS)
+    writer.writerows(rows)
+
+    message = EmailMultiAlternatives(
+        subject=f"Attendance Digest - {organization.name} - {day:%Y-%m-%d}",
+        body=text_body,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[organization.email],
+        connection=connection,
+    )
+    message.attach_alternative(html_body, 'text/html')
+    message.attach(f"attendance-{day:%Y-%m-%d}.csv", csv_buffer.getvalue(), 'text/csv')
+    return message
+
+
+def _send_with_retry(connection, message, retries, backoff):
+    """Send one message over the shared connection, reconnecting between attempts."""
+    for attempt in range(1, retries + 1):
+        try:
+            return connection.send_messages([message])
+        except Exception as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"⚠️ Digest to {message.to[0]} failed (attempt {attempt}/{retries}): {str(e)}")
+            connection.close()
+            time.sleep(backoff * attempt)
+            connection.open()
+
+
+def send_attendance_digest(day=None, connection=None):
+    """
+    Send one attendance digest per organization for `day` (defaults to today),
+    all over a single SMTP connection. Returns the number of messages sent.
+    """
+    day = day or timezone.localdate()
+    records = (
+        Attendance.objects.filter(date=day)
+        .select_related('employee__organization')
+        .order_by('employee__name')
+    )
+
+    # Group the day's rows by organization email
+    organizations = {}
+    grouped = defaultdict(list)
+    for record in records:
+        organization = record.employee.organization
+        organizations.setdefault(organization.email, organization)
+        grouped[organization.email].append(record)
+
+    if not grouped:
+        return 0
+
+    connection = connection or get_connection(fail_silently=False)
+    interval = settings.ATTENDANCE_DIGEST_SEND_INTERVAL
+    retries = settings.ATTENDANCE_DIGEST_MAX_RETRIES
+    sent = 0
+    connection.open()
+    try:
+        for position, (email, org_records) in enumerate(grouped.items()):
+            organization = organizations[email]
+            if position and interval:
+                # Throttle so large runs stay under the SMTP provider's rate limits
+                time.sleep(interval)
+            try:
+                message = build_digest_message(organization, day, org_records, connection=connection)
+                sent += _send_with_retry(connection, message, retries, interval or 1)
+                logger.info(f"✉️ Sent attendance digest to {organization.name} ({len(org_records)} records)")
+            except Exception as e:
+                logger.error(f"⚠️ Failed to send attendance digest to {organization.name}: {str(e)}")
+    finally:
+        connection.close()
+    return sent
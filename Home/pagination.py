@@ -0,0 +1,58 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row on a page as an opaque cursor."""
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor back into typed sort-key values. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Invalid cursor')
+    try:
+        return [model._meta.get_field(field).to_python(value) for (field, _), value in zip(ordering, values)]
+    except (ValidationError, TypeError):
+        # Well-formed JSON whose values do not fit the fields (a tampered cursor)
+        raise ValueError('Invalid cursor')
+
+
+def _after(ordering, values):
+    # Rows strictly after the cursor: (a > x) OR (a = x AND b > y) OR ...
+    condition = Q()
+    for position, (field, descending) in enumerate(ordering):
+        clause = Q(**{f"{field}__{'lt' if descending else 'gt'}": values[position]})
+        for earlier, (previous, _) in enumerate(ordering[:position]):
+            clause &= Q(**{previous: values[earlier]})
+        condition |= clause
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=10):
+    """
+    Return one page of `queryset` and the cursor of the next page (None on the last page).
+    `ordering` is a list of (field, descending) pairs ending in a unique field, e.g.
+    [('name', False), ('id', False)]. Each page is a range scan from the cursor plus a
+    LIMIT, so page 1000 costs the same as page 1 (no skip).
+    """
+    queryset = queryset.order_by(*[f"{'-' if descending else ''}{field}" for field, descending in ordering])
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([getattr(rows[-1], field) for field, _ in ordering])
+    return rows, next_cursor
@@ -0,0 +1,173 @@
+"""
+Native pymongo reads for the hottest query paths.
+
+Every ORM query goes through Django's SQL compiler and then djongo's
+sqlparse-based translator back into a Mongo operation; for simple indexed
+lookups that translation costs more CPU than the query itself. The functions
+here talk to the collections directly (through the shared client, see
+Backend/mongo.py) and return plain dicts/Row objects, or model instances built
+with model_from_document where callers need one.
+
+`python manage.py benchmark_read_paths` compares each function with its ORM
+equivalent.
+"""
+import re
+from datetime import timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .models import Attendance, EmployeeSignup, Organization, mongo_date
+from .utils import get_collection, model_from_document
+
+
+class Row(dict):
+    """A document as a dict that also allows attribute access (row.name), for serializers."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _projection(names):
+    projection = {name: 1 for name in names}
+    projection.setdefault('_id', 0)
+    return projection
+
+
+def _aware(value):
+    return timezone.make_aware(value, dt_timezone.utc) if value is not None else None
+
+
+def _with_organizations(employees):
+    """Attach each employee's organization (one query for all of them), as select_related would."""
+    org_ids = {employee.organization_id for employee in employees}
+    if not org_ids:
+        return employees
+    organizations = {
+        document['id']: model_from_document(Organization, document)
+        for document in get_collection(Organization).find({'id': {'$in': list(org_ids)}})
+    }
+    for employee in employees:
+        if employee.organization_id in organizations:
+            employee.organization = organizations[employee.organization_id]
+    return employees
+
+
+def employee_by_rfid(card_uid):
+    """
+    EmployeeSignup (with its organization) for a normalized card UID, or None.
+    Tries the exact stored spellings on the unique rfid index first; only a miss
+    falls back to the case-insensitive scan.
+    """
+    if not card_uid:
+        return None
+    collection = get_collection(EmployeeSignup)
+    document = collection.find_one({'rfid': {'$in': [card_uid, card_uid.upper()]}})
+    if document is None:
+        document = collection.find_one({'rfid': {'$regex': f'^{re.escape(card_uid)}$', '$options': 'i'}})
+    if document is None:
+        return None
+    return _with_organizations([model_from_document(EmployeeSignup, document)])[0]
+
+
+def employees_by_rfids(card_uids):
+    """
+    EmployeeSignups (with organizations) for normalized card UIDs, ignoring case.
+    As in employee_by_rfid, the exact stored spellings are tried on the unique
+    rfid index first; only the cards still missing go to one case-insensitive query.
+    """
+    keys = set(card_uids)
+    if not keys:
+        return []
+    collection = get_collection(EmployeeSignup)
+    documents = list(collection.find({'rfid': {'$in': list(keys | {key.upper() for key in keys})}}))
+    remaining = keys - {(document.get('rfid') or '').lower() for document in documents}
+    if remaining:
+        documents += collection.find({'$or': [
+            {'rfid': {'$regex': f'^{re.escape(key)}$', '$options': 'i'}} for key in remaining
+        ]})
+    return _with_organizations([model_from_document(EmployeeSignup, document) for document in documents])
+
+
+def employee_by_id(employee_id):
+    """EmployeeSignup (with its organization) by primary key, or None."""
+    document = get_collection(EmployeeSignup).find_one({'id': employee_id})
+    if document is None:
+        return None
+    return _with_organizations([model_from_document(EmployeeSignup, document)])[0]
+
+
+def card_holders(employee_ids):
+    """{employee id: (rfid, is_active)} for the given employees that still exist; one indexed read."""
+    cursor = get_collection(EmployeeSignup).find(
+        {'id': {'$in': list(employee_ids)}}, _projection(['id', 'rfid', 'is_active'])
+    )
+    return {document['id']: (document.get('rfid'), document.get('is_active')) for document in cursor}
+
+
+def employee_rows(org_id, fields=('id', 'unique_id', 'name')):
+    """An organization's employees as plain dicts with `fields`, ordered by name."""
+    attnames = [EmployeeSignup._meta.get_field(name).attname for name in fields]
+    cursor = get_collection(EmployeeSignup).find(
+        {'organization_id': org_id}, _projection(attnames)
+    ).sort([('name', 1), ('id', 1)])
+    return [{name: document.get(attname) for name, attname in zip(fields, attnames)} for document in cursor]
+
+
+def count_employees(org_id):
+    return get_collection(EmployeeSignup).count_documents({'organization_id': org_id})
+
+
+def employee_page(org_id, fields, skip=0, limit=10):
+    """
+    One page of an organization's employees (ordered by name, id) as model
+    instances with only `fields` loaded, like .only(*fields)[skip:skip + limit].
+    """
+    attnames = {EmployeeSignup._meta.get_field(name).attname for name in fields} | {'id'}
+    cursor = get_collection(EmployeeSignup).find(
+        {'organization_id': org_id}, _projection(attnames)
+    ).sort([('name', 1), ('id', 1)]).skip(skip).limit(limit)
+    return [model_from_document(EmployeeSignup, document, attnames) for document in cursor]
+
+
+def _attendance_rows(query):
+    rows = []
+    for document in get_collection(Attendance).find(query, {'_id': 0}):
+        rows.append(Row(
+            employee_id=document['employee_id'],
+            employee_unique_id=document.get('employee_unique_id'),
+            date=document['date'].date(),
+            check_in=_aware(document.get('check_in')),
+            check_out=_aware(document.get('check_out')),
+            status=document.get('status'),
+        ))
+    return rows
+
+
+def attendance_range(employee_ids, start, end):
+    """Attendance rows of the given employees from start to end (inclusive dates)."""
+    return _attendance_rows({
+        'employee_id': {'$in': list(employee_ids)},
+        'date': {'$gte': mongo_date(start), '$lt': mongo_date(end + timedelta(days=1))},
+    })
+
+
+def attendance_today(org_id, day=None):
+    """Today's (or `day`'s) attendance rows of an organization's employees."""
+    employee_ids = [row['id'] for row in employee_rows(org_id, fields=('id',))]
+    if not employee_ids:
+        return []
+    day = day or timezone.now().date()
+    return _attendance_rows({'employee_id': {'$in': employee_ids}, 'date': mongo_date(day)})
+
+
+def count_attendance(employee_ids, day):
+    """Number of attendance rows for the given employees on `day`."""
+    if not employee_ids:
+        return 0
+    return get_collection(Attendance).count_documents({
+        'employee_id': {'$in': list(employee_ids)},
+        'date': mongo_date(day),
+    })
@@ -0,0 +1,206 @@
+import logging
+import threading
+
+from django.core.cache import cache
+
+from .cache import is_shared, make_key, ttl_for
+from . import repository
+
+logger = logging.getLogger(__name__)
+
+# Shared index version; bumping it (clear()) empties every process's local entries
+VERSION_KEY = make_key('rfid', 'version')
+
+
+def normalize_card_uid(card_uid):
+    """Normalize a card UID the same way receive_rfid does (trimmed, lower-cased)."""
+    return (card_uid or "").strip().lower()
+
+
+def _card_key(key):
+    return make_key('rfid', 'card', key)
+
+
+class RFIDIndex:
+    """
+    Card UID -> employee index for the RFID scan hot path.
+
+    Keys are normalized card UIDs. Each process keeps EmployeeSignup instances
+    (loaded with their organization) in memory; the shared cache holds a
+    card -> employee id map and a version number. A local entry is only used
+    while the shared map still points its card at the same employee, so
+    deleting one card's shared key invalidates that card in every process; a
+    card found only in the shared map is loaded by primary key instead of the
+    case-insensitive rfid scan. Misses are read with native pymongo queries
+    (Home/repository.py). Cards are invalidated when an employee's rfid or
+    is_active changes, or the employee is deleted (see Home/signals.py); the
+    shared version only moves on clear().
+
+    With a per-process cache (locmem) another worker's invalidation never
+    arrives, so a local entry is instead checked against the stored row: one
+    projected read by primary key (repository.card_holders) confirms the
+    employee still exists with the same rfid and is_active. That still skips
+    the organization load and the case-insensitive card scan.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._keys_by_employee = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _sync_version(self):
+        version = cache.get_or_set(VERSION_KEY, 1, None)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._keys_by_employee.clear()
+                self._version = version
+
+    def lookup(self, card_uid):
+        """Return the employee for card_uid, or None if the card is not assigned."""
+        key = normalize_card_uid(card_uid)
+        if not key:
+            return None
+
+        self._sync_version()
+        with self._lock:
+            employee = self._entries.get(key)
+        if employee is not None:
+            if key in self._current({key: employee}):
+                with self._lock:
+                    self.hits += 1
+                return employee
+            self._drop_local(key)
+
+        employee = self._load_shared(key)
+        if employee is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            employee = self._load(key)
+        if employee is not None:
+            self._store(key, employee)
+        return employee
+
+    def lookup_many(self, card_uids):
+        """
+        Resolve many card UIDs at once. Index misses are loaded with a single query.
+        Returns a dict of normalized card UID -> employee for the cards that exist.
+        """
+        self._sync_version()
+        keys = {normalize_card_uid(card_uid) for card_uid in card_uids} - {""}
+        with self._lock:
+            local = {key: self._entries[key] for key in keys if key in self._entries}
+        current = self._current(local)
+
+        found = {}
+        missing = set()
+        for key in keys:
+            employee = local.get(key)
+            if key in current:
+                found[key] = employee
+            else:
+                if employee is not None:
+                    self._drop_local(key)
+                missing.add(key)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            for employee in repository.employees_by_rfids(missing):
+                key = normalize_card_uid(employee.rfid)
+                if key in missing:
+                    found[key] = employee
+                    self._store(key, employee)
+        return found
+
+    def _current(self, local):
+        """The keys of `local` ({key: employee}) whose entries are still valid."""
+        if not local:
+            return set()
+        if is_shared():
+            shared = cache.get_many([_card_key(key) for key in local])
+            return {key for key, employee in local.items() if shared.get(_card_key(key)) == employee.pk}
+        holders = repository.card_holders({employee.pk for employee in local.values()})
+        return {key for key, employee in local.items()
+                if holders.get(employee.pk) == (employee.rfid, employee.is_active)}
+
+    def _load_shared(self, key):
+        if not is_shared():
+            # Nothing another process wrote can be in this process's cache
+            return None
+        employee_id = cache.get(_card_key(key))
+        if employee_id is None:
+            return None
+        employee = repository.employee_by_id(employee_id)
+        if employee is None or normalize_card_uid(employee.rfid) != key:
+            # The card was reassigned or the employee removed since the entry was written
+            cache.delete(_card_key(key))
+            return None
+        return employee
+
+    def _load(self, key):
+        return repository.employee_by_rfid(key)
+
+    def _store(self, key, employee):
+        cache.set(_card_key(key), employee.pk, ttl_for('rfid'))
+        with self._lock:
+            self._entries[key] = employee
+            self._keys_by_employee[employee.pk] = key
+
+    def _drop_local(self, key):
+        with self._lock:
+            employee = self._entries.pop(key, None)
+            if employee is not None and self._keys_by_employee.get(employee.pk) == key:
+                del self._keys_by_employee[employee.pk]
+
+    def _bump_version(self):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, None)
+
+    def invalidate_employee(self, employee_id):
+        """Drop whatever card this process has cached for the employee, in every process."""
+        with self._lock:
+            key = self._keys_by_employee.get(employee_id)
+        if key is not None:
+            self.invalidate_card(key)
+
+    def invalidate_card(self, card_uid):
+        """
+        Drop the entry for a single card UID. Other processes notice the missing
+        shared key on their next lookup of that card.
+        """
+        key = normalize_card_uid(card_uid)
+        self._drop_local(key)
+        cache.delete(_card_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_employee.clear()
+        self._bump_version()
+
+    def stats(self):
+        """Return hit/miss counters and the current index size for this process."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': ((self.hits + self.shared_hits) / lookups) if lookups else 0.0,
+            }
+
+
+# Shared per-process instance used by the views
+rfid_index = RFIDIndex()
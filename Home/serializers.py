@@ -1,11 +1,61 @@
 from rest_framework import serializers
 from Home.models import EmployeeSignup, Query, Organization
 from .models import Attendance
+from .images import image_url, variant_urls
 
 class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeSignup
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
+
+class EmployeeListSerializer(serializers.ModelSerializer):
+    """
+    Compact employee representation for lists and login responses.
+    Leaves out the password hash and the groups/user_permissions relations, so
+    serializing an employee never touches the M2M tables. Pass `fields` to
+    return only a subset of the columns (sparse fieldset).
+    """
+    photo = serializers.SerializerMethodField()
+    photo_variants = serializers.SerializerMethodField()
+
+    # Model columns behind computed fields, for .only() projections
+    SOURCE_FIELDS = {'photo': ('photo', 'photo_status'), 'photo_variants': ('photo', 'photo_status')}
+
+    class Meta:
+        model = EmployeeSignup
+        fields = ['id', 'unique_id', 'name', 'email', 'rfid', 'photo', 'photo_status', 'photo_variants',
+                  'organization', 'is_active', 'date_joined']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, value):
+        """Parse a `?fields=a,b` parameter into known field names (all fields when empty)."""
+        requested = {name.strip() for name in (value or '').split(',')}
+        return [name for name in cls.Meta.fields if name in requested] or list(cls.Meta.fields)
+
+    @classmethod
+    def model_fields(cls, fields):
+        """Model columns needed to serialize `fields`."""
+        columns = set()
+        for name in fields:
+            columns.update(cls.SOURCE_FIELDS.get(name, (name,)))
+        return columns
+
+    def get_photo(self, obj):
+        # Uploads are only served once the image worker has accepted them
+        return image_url(obj.photo, obj.photo_status, self.context.get('request'))
+
+    def get_photo_variants(self, obj):
+        # Variants exist once the image worker has processed the upload
+        if obj.photo_status != 'ready':
+            return None
+        return variant_urls(obj.photo, self.context.get('request'))
 
 class ContactQuerySerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,20 +64,26 @@ class ContactQuerySerializer(serializers.ModelSerializer):
 
 class OrganizationSerializer(serializers.ModelSerializer):
     logo = serializers.SerializerMethodField()
+    logo_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Organization
-        fields = ['id', 'name', 'email', 'logo']
+        fields = ['id', 'name', 'email', 'logo', 'logo_status', 'logo_variants']
 
     def get_logo(self, obj):
-        request = self.context.get('request')
-        if obj.logo:
-            return request.build_absolute_uri(obj.logo.url) if request else obj.logo.url
-        return None
+        return image_url(obj.logo, obj.logo_status, self.context.get('request'))
+
+    def get_logo_variants(self, obj):
+        if obj.logo_status != 'ready':
+            return None
+        return variant_urls(obj.logo, self.context.get('request'))
 
 class AttendanceSerializer(serializers.ModelSerializer):
-    employee_unique_id = serializers.CharField(source="employee.unique_id")
-    employee_name = serializers.CharField(source="employee.name")
+    # Employee details come from the bulk-loaded `employees` context map
+    # ({employee_id: (unique_id, name)}) when the view provides one, so listing
+    # attendance does not fetch the employee once per row.
+    employee_unique_id = serializers.SerializerMethodField()
+    employee_name = serializers.SerializerMethodField()
     # Format check_in to a simple time string (use your preferred format)
     check_in = serializers.DateTimeField(format="%H:%M:%S", required=False, allow_null=True)
     check_out = serializers.DateTimeField(format="%H:%M:%S", required=False, allow_null=True)
@@ -37,4 +93,17 @@ class AttendanceSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Attendance
-        fields = ["employee_unique_id", "employee_name", "check_in", "check_out", "date", "status"]
\ No newline at end of file
+        fields = ["employee_unique_id", "employee_name", "check_in", "check_out", "date", "status"]
+
+    def _employee_info(self, obj):
+        employees = self.context.get('employees')
+        if employees is not None and obj.employee_id in employees:
+            return employees[obj.employee_id]
+        return obj.employee.unique_id, obj.employee.name
+
+    def get_employee_unique_id(self, obj):
+        # Attendance stores the unique id denormalized; older rows may not have it
+        return obj.employee_unique_id or self._employee_info(obj)[0]
+
+    def get_employee_name(self, obj):
+        return self._employee_info(obj)[1]
@@ -0,0 +1,74 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import counters
+from .authentication import EMPLOYEE, ORGANIZATION, revoke_user
+from .cache import bump_org_version
+from .models import EmployeeSignup, Organization, Query
+from .rfid_index import rfid_index
+
+
+@receiver(post_save, sender=EmployeeSignup)
+def invalidate_changed_card(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the RFID index in sync with add_employee, the admin and deactivation.
+    Only a change of rfid or is_active touches the index, and then only the old
+    and new card are dropped, so a changed RFID never resolves to the old card.
+    """
+    if update_fields is not None and not set(update_fields) & set(EmployeeSignup.CARD_FIELDS):
+        return
+    for card_uid in instance.card_changes():
+        rfid_index.invalidate_card(card_uid)
+
+
+@receiver(post_delete, sender=EmployeeSignup)
+def invalidate_removed_card(sender, instance, **kwargs):
+    rfid_index.invalidate_employee(instance.pk)
+    if instance.rfid:
+        rfid_index.invalidate_card(instance.rfid)
+
+
+@receiver(post_save, sender=EmployeeSignup)
+@receiver(post_delete, sender=EmployeeSignup)
+def invalidate_employee_lists(sender, instance, **kwargs):
+    """Cached employee lists of the organization are stale after any change."""
+    bump_org_version(instance.organization_id)
+
+
+@receiver(post_save, sender=EmployeeSignup)
+def count_added_employee(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.organization_id, counters.EMPLOYEE_COUNT)
+
+
+@receiver(post_delete, sender=EmployeeSignup)
+def count_removed_employee(sender, instance, **kwargs):
+    counters.increment(instance.organization_id, counters.EMPLOYEE_COUNT, -1)
+    # The employee's attendance rows go with it; recount today's attendance on the next read
+    counters.forget(instance.organization_id, counters.ATTENDANCE_TODAY)
+
+
+@receiver(post_save, sender=Query)
+def count_added_query(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(instance.organization_id, counters.QUERY_COUNT)
+
+
+@receiver(post_delete, sender=Query)
+def count_removed_query(sender, instance, **kwargs):
+    counters.increment(instance.organization_id, counters.QUERY_COUNT, -1)
+
+
+@receiver(post_save, sender=EmployeeSignup)
+@receiver(post_delete, sender=EmployeeSignup)
+def revoke_employee_tokens(sender, instance, **kwargs):
+    """Tokens carry the employee's claims; a removed or deactivated employee must not keep using them."""
+    if kwargs.get('signal') is post_delete or not instance.is_active:
+        revoke_user(EMPLOYEE, instance.pk)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def revoke_organization_tokens(sender, instance, **kwargs):
+    if kwargs.get('signal') is post_delete or not instance.is_active:
+        revoke_user(ORGANIZATION, instance.pk)
@@ -0,0 +1,213 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import Attendance, EmployeeSignup
+
+logger = logging.getLogger(__name__)
+
+# Claims older than this are assumed to belong to a worker that died mid-batch
+STALE_CLAIM_SECONDS = 300
+
+
+class TapQueue:
+    """
+    Durable write-behind queue for RFID taps.
+
+    receive_rfid appends taps to an SQLite journal on local disk and answers
+    immediately; a background thread drains the journal into Attendance in
+    batches through Attendance.bulk_mark_attendance. Rows are only deleted
+    after Mongo accepted the batch, and replaying a batch is harmless: check-in
+    is $setOnInsert, check-out only moves forward, and a replayed check-in tap
+    (its time is the record's check_in) is not taken for a check-out. A crash at
+    any point therefore loses nothing: `manage.py replay_rfid_queue` drains
+    whatever is left, taking back only claims older than STALE_CLAIM_SECONDS.
+    """
+
+    def __init__(self, path, batch_size=200, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.processed = 0
+        self.failed_batches = 0
+        self.last_error = None
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # ---------------------------
+    # Journal access
+    # ---------------------------
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads, so keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=FULL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS taps ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' employee_id INTEGER NOT NULL,'
+                ' card_uid TEXT NOT NULL,'
+                ' scanned_at TEXT NOT NULL,'
+                ' claimed_at REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, employee_id, card_uid, scanned_at):
+        """Append one tap to the journal and make sure a worker will drain it."""
+        self._connection().execute(
+            'INSERT INTO taps (employee_id, card_uid, scanned_at) VALUES (?, ?, ?)',
+            (employee_id, card_uid, scanned_at.isoformat()),
+        )
+        self.start()
+        self._wakeup.set()
+
+    def depth(self):
+        """Number of taps written to the journal but not yet stored in Attendance."""
+        return self._connection().execute('SELECT COUNT(*) FROM taps').fetchone()[0]
+
+    def release_claims(self, older_than=0):
+        """Hand claimed-but-unfinished rows back to the queue."""
+        cursor = self._connection().execute(
+            'UPDATE taps SET claimed_at = NULL WHERE claimed_at IS NOT NULL AND claimed_at <= ?',
+            (time.time() - older_than,),
+        )
+        return cursor.rowcount
+
+    def _claim(self, limit):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                'SELECT id, employee_id, scanned_at FROM taps'
+                ' WHERE claimed_at IS NULL ORDER BY id LIMIT ?',
+                (limit,),
+            ).fetchall()
+            if rows:
+                connection.executemany(
+                    'UPDATE taps SET claimed_at = ? WHERE id = ?',
+                    [(time.time(), row[0]) for row in rows],
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return rows
+
+    # ---------------------------
+    # Draining
+    # ---------------------------
+    def drain_once(self, batch_size=None):
+        """Move one batch from the journal into Attendance. Returns the number of taps handled."""
+        rows = self._claim(batch_size or self.batch_size)
+        if not rows:
+            return 0
+
+        ids = [row[0] for row in rows]
+        try:
+            employees = EmployeeSignup.objects.select_related('organization').in_bulk(
+                {row[1] for row in rows}
+            )
+            taps = [
+                (employees[employee_id], datetime.fromisoformat(scanned_at))
+                for _, employee_id, scanned_at in rows
+                # Taps of employees removed meanwhile are dropped with the batch
+                if employee_id in employees
+            ]
+            Attendance.bulk_mark_attendance(taps, status='P')
+        except Exception:
+            self._connection().executemany(
+                'UPDATE taps SET claimed_at = NULL WHERE id = ?', [(tap_id,) for tap_id in ids]
+            )
+            raise
+
+        self._connection().executemany('DELETE FROM taps WHERE id = ?', [(tap_id,) for tap_id in ids])
+        self.processed += len(rows)
+        return len(rows)
+
+    def flush(self, batch_size=None):
+        """Drain the journal until it is empty. Returns the number of taps handled."""
+        total = 0
+        while True:
+            handled = self.drain_once(batch_size)
+            if not handled:
+                return total
+            total += handled
+
+    # ---------------------------
+    # Background worker
+    # ---------------------------
+    def start(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, name='rfid-tap-queue', daemon=True)
+            self._worker.start()
+            atexit.unregister(self.shutdown)
+            atexit.register(self.shutdown)
+            logger.info(f"📥 Started RFID write-behind worker ({self.path})")
+
+    def _run(self):
+        try:
+            self.release_claims(older_than=STALE_CLAIM_SECONDS)
+        except Exception as e:
+            logger.error(f"⚠️ RFID queue claim recovery failed: {str(e)}")
+
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.failed_batches += 1
+                self.last_error = str(e)
+                logger.error(f"⚠️ RFID queue drain failed: {str(e)}")
+                self._stopping.wait(self.flush_interval)
+
+    def shutdown(self, timeout=10):
+        """Stop the worker and flush whatever is still queued (registered with atexit)."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        try:
+            flushed = self.flush()
+            if flushed:
+                logger.info(f"📥 Flushed {flushed} queued RFID taps on shutdown")
+        except Exception as e:
+            logger.error(f"⚠️ RFID queue flush on shutdown failed, run replay_rfid_queue: {str(e)}")
+
+    def stats(self):
+        return {
+            'enabled': settings.RFID_WRITE_BEHIND,
+            'depth': self.depth(),
+            'processed': self.processed,
+            'failed_batches': self.failed_batches,
+            'last_error': self.last_error,
+            'worker_alive': self._worker is not None and self._worker.is_alive(),
+        }
+
+
+# Shared per-process queue; the journal file itself is shared by all workers on the host
+tap_queue = TapQueue(
+    settings.RFID_QUEUE_PATH,
+    batch_size=settings.RFID_QUEUE_BATCH_SIZE,
+    flush_interval=settings.RFID_QUEUE_FLUSH_INTERVAL,
+)
@@ -1,3 +1,711 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import zipfile
+from contextlib import contextmanager
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import NotSupportedError, connection
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pymongo import monitoring
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from Backend.db_operations import install_translation_cache, translation_cache, uninstall_translation_cache
+
+from . import bulk_import, counters
+from .authentication import EMPLOYEE, ClaimsJWTAuthentication, issue_tokens, is_revoked, revoke_token
+from .cache import TTLS, bump_org_version, get_or_set_org, get_org, make_key, org_key, org_version, set_org
+from .management.commands.run_attendance_digest import Command as DigestWorker
+from .models import Attendance, EmployeeSignup, Organization, Query
+from .notifications import acquire_digest_lock, digest_claimed, release_digest_lock
+from .pagination import encode_cursor
+from .rfid_index import RFIDIndex
+from .serializers import EmployeeListSerializer
+from .tap_queue import TapQueue
+from .utils import get_collection
+
+
+class CommandLog(monitoring.CommandListener):
+    """
+    Records the Mongo commands sent while capture() is active. Raw pymongo reads
+    (Home/repository.py) never reach Django's query log, so assertNumQueries
+    cannot see them; this counts both those and djongo's.
+    """
+
+    def __init__(self):
+        self.commands = None
+
+    @contextmanager
+    def capture(self):
+        self.commands = []
+        try:
+            yield self.commands
+        finally:
+            self.commands = None
+
+    def started(self, event):
+        if self.commands is not None:
+            self.commands.append((event.command_name, event.command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Registered at import, before the test runner opens the first connection
+command_log = CommandLog()
+monitoring.register(command_log)
+
+
+def reads(commands):
+    return [name for name, _ in commands if name in ('find', 'aggregate', 'count', 'getMore')]
+
+
+def make_organization(number=1):
+    return Organization.objects.create(name=f'Org {number}', email=f'org{number}@example.com', password='unused')
+
+
+def make_employees(organization, count, start=0):
+    # Every employee gets a card: djongo's migrations create a plain (not partial)
+    # unique index on rfid, so two rows without one collide on null
+    return [
+        EmployeeSignup.objects.create(
+            organization=organization,
+            unique_id=f'{organization.pk}-E{number}',
+            name=f'Employee {number:03d}',
+            email=f'employee{number}@org{organization.pk}.example.com',
+            rfid=f'{organization.pk:02d}{number:06d}',
+        )
+        for number in range(start, start + count)
+    ]
+
+
+class MonthlyAttendanceQueryCountTests(TestCase):
+    """get_monthly_attendance reads a fixed number of times, however many rows it returns."""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = make_organization()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organization)
+
+    def add_attendance(self, employees, days):
+        for employee in employees:
+            for day in range(1, days + 1):
+                Attendance.objects.create(
+                    employee=employee,
+                    employee_unique_id=employee.unique_id,
+                    date=date(2026, 3, day),
+                    check_in=datetime(2026, 3, day, 9, tzinfo=dt_timezone.utc),
+                    status='P',
+                )
+
+    def fetch(self):
+        url = reverse('get_monthly_attendance', args=[2026, 3])
+        with self.assertNumQueries(0), command_log.capture() as commands:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), reads(commands)
+
+    def test_read_count_does_not_grow_with_rows(self):
+        employees = make_employees(self.organization, 2)
+        self.add_attendance(employees, 2)
+        rows, few = self.fetch()
+        self.assertEqual(len(rows), 4)
+
+        self.add_attendance(make_employees(self.organization, 8, start=2), 10)
+        rows, many = self.fetch()
+        self.assertEqual(len(rows), 84)
+        self.assertEqual(many, few)
+        # One read for the employees, one for their attendance
+        self.assertEqual(len(many), 2)
+
+    def test_rows_carry_employee_details_without_extra_reads(self):
+        employee, = make_employees(self.organization, 1)
+        self.add_attendance([employee], 1)
+        rows, _ = self.fetch()
+        check_in = timezone.localtime(datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc))
+        self.assertEqual(rows, [{
+            'employee_unique_id': employee.unique_id,
+            'employee_name': employee.name,
+            'check_in': check_in.strftime('%H:%M:%S'),
+            'check_out': None,
+            'date': '2026-03-01',
+            'status': 'P',
+        }])
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= on manage_employees: unknown names are ignored and only the requested columns are read."""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = make_organization()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.organization)
+        make_employees(self.organization, 3)
+
+    def fetch(self, fields):
+        with command_log.capture() as commands:
+            response = self.client.get(reverse('manage_employees'), {'fields': fields})
+        self.assertEqual(response.status_code, 200)
+        finds = [command for name, command in commands if name == 'find' and command['find'] == 'Home_employeesignup']
+        return response.json(), finds
+
+    def test_requested_fields_ignores_unknown_names(self):
+        self.assertEqual(EmployeeListSerializer.requested_fields('name, id,nope'), ['id', 'name'])
+        self.assertEqual(EmployeeListSerializer.requested_fields('password'), EmployeeListSerializer.Meta.fields)
+        self.assertEqual(EmployeeListSerializer.requested_fields(''), EmployeeListSerializer.Meta.fields)
+
+    def test_computed_fields_map_to_their_columns(self):
+        self.assertEqual(EmployeeListSerializer.model_fields(['id', 'photo_variants']), {'id', 'photo', 'photo_status'})
+
+    def test_response_has_only_requested_fields(self):
+        data, _ = self.fetch('id,name,password,bogus')
+        self.assertEqual(data['total'], 3)
+        self.assertEqual([sorted(employee) for employee in data['employees']], [['id', 'name']] * 3)
+
+    def test_projection_matches_requested_fields(self):
+        _, finds = self.fetch('id,name')
+        self.assertEqual(len(finds), 1)
+        self.assertEqual(finds[0]['projection'], {'id': 1, 'name': 1, '_id': 0})
+
+        _, finds = self.fetch('email,photo')
+        self.assertEqual(
+            finds[0]['projection'], {'id': 1, 'email': 1, 'photo': 1, 'photo_status': 1, '_id': 0}
+        )
+
+    def test_password_is_never_returned(self):
+        data, _ = self.fetch('')
+        self.assertEqual(len(data['employees']), 3)
+        for employee in data['employees']:
+            self.assertNotIn('password', employee)
+
+
+class TranslationCacheTests(TestCase):
+    """Cached statement parses must give the same results as parsing every statement afresh."""
+
+    def setUp(self):
+        self.organization = make_organization()
+        self.employees = make_employees(self.organization, 5)
+        for employee in self.employees[:3]:
+            Attendance.objects.create(
+                employee=employee,
+                employee_unique_id=employee.unique_id,
+                date=date(2026, 3, 2),
+                check_in=datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc),
+                status='P',
+            )
+
+    def tearDown(self):
+        install_translation_cache()
+
+    def run_queries(self):
+        ids = [employee.pk for employee in self.employees]
+        results = []
+        # Same template, different literals
+        for employee in self.employees:
+            results.append(list(EmployeeSignup.objects.filter(name=employee.name).values_list('id', flat=True)))
+            results.append(list(
+                Attendance.objects.filter(employee=employee, date=date(2026, 3, 2)).values_list('status', flat=True)
+            ))
+        # IN lists of different lengths give different templates
+        for length in range(1, len(ids) + 1):
+            results.append(sorted(EmployeeSignup.objects.filter(id__in=ids[:length]).values_list('id', flat=True)))
+        results.append(sorted(
+            EmployeeSignup.objects.filter(Q(name=self.employees[0].name) | Q(id__in=ids[3:]))
+            .values_list('id', flat=True)
+        ))
+        return results
+
+    def test_cached_results_match_uncached(self):
+        uninstall_translation_cache()
+        uncached = self.run_queries()
+        self.assertIn(['P'], uncached)
+        self.assertEqual(uncached[-2], sorted(employee.pk for employee in self.employees))
+
+        install_translation_cache()
+        translation_cache.clear()
+        first = self.run_queries()
+        after_first = translation_cache.stats()
+        second = self.run_queries()
+        after_second = translation_cache.stats()
+
+        self.assertEqual(first, uncached)
+        self.assertEqual(second, uncached)
+        # Repeated templates hit within the first run; the second run parses nothing new
+        self.assertGreater(after_first['hits'], 0)
+        self.assertEqual(after_second['misses'], after_first['misses'])
+        self.assertGreater(after_second['hits'], after_first['hits'])
+
+    def test_different_in_list_lengths_do_not_share_a_parse(self):
+        install_translation_cache()
+        translation_cache.clear()
+        ids = [employee.pk for employee in self.employees]
+        employee_ids = EmployeeSignup.objects.order_by('id').values_list('id', flat=True)
+        self.assertEqual(list(employee_ids.filter(id__in=ids[:2])), ids[:2])
+        self.assertEqual(list(employee_ids.filter(id__in=ids)), ids)
+        self.assertEqual(translation_cache.stats()['size'], 2)
+
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+# Django's own RedisCache, talking to an in-process fake Redis server
+REDIS_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': 'redis://cache-tests:6379/0',
+    'TIMEOUT': 60,
+    'KEY_PREFIX': 'attendance',
+    'OPTIONS': {'connection_class': fakeredis.FakeConnection} if fakeredis else {},
+}}
+
+
+@unittest.skipUnless(fakeredis, 'fakeredis is not installed')
+@override_settings(CACHES=REDIS_CACHES)
+class OrgCacheTests(SimpleTestCase):
+    """Versioned per-organization keys in Home/cache.py, on a Redis cache."""
+
+    def setUp(self):
+        cache.clear()
+
+    def ttl(self, key):
+        """Seconds left on a key in Redis (-1: no expiry, -2: missing)."""
+        full_key = cache.make_key(key)
+        return cache._cache.get_client(full_key).ttl(full_key)
+
+    def test_keys_are_namespaced_and_versioned(self):
+        self.assertEqual(make_key('rfid', 'card', 'ABC'), 'rfid:card:ABC')
+        version = org_version(7)
+        self.assertEqual(org_key(7, 'employees', 1, 10), f'employees:7:v{version}:1:10')
+        self.assertEqual(bump_org_version(7), version + 1)
+        self.assertEqual(org_key(7, 'employees', 1, 10), f'employees:7:v{version + 1}:1:10')
+
+    def test_bump_makes_old_entries_unreachable(self):
+        set_org(7, 'employees', 1, value=['a'])
+        self.assertEqual(get_org(7, 'employees', 1), ['a'])
+        bump_org_version(7)
+        self.assertIsNone(get_org(7, 'employees', 1))
+
+    def test_bump_only_affects_its_organization(self):
+        set_org(7, 'employees', 1, value='seven')
+        set_org(8, 'employees', 1, value='eight')
+        version = org_version(8)
+        bump_org_version(7)
+        self.assertIsNone(get_org(7, 'employees', 1))
+        self.assertEqual(get_org(8, 'employees', 1), 'eight')
+        self.assertEqual(org_version(8), version)
+
+    def test_lost_version_does_not_resurrect_old_entries(self):
+        set_org(7, 'employees', 1, value='old')
+        bump_org_version(7)
+        set_org(7, 'employees', 1, value='newer')
+        # The version key is evicted (or Redis restarted without the pages going with it)
+        cache.delete(make_key('org-version', 7))
+        self.assertIsNone(get_org(7, 'employees', 1))
+        cache.delete(make_key('org-version', 7))
+        bump_org_version(7)
+        self.assertIsNone(get_org(7, 'employees', 1))
+
+    def test_get_or_set_computes_once_per_version(self):
+        compute = mock.Mock(return_value='page')
+        self.assertEqual(get_or_set_org(7, 'employees', 1, compute=compute), 'page')
+        self.assertEqual(get_or_set_org(7, 'employees', 1, compute=compute), 'page')
+        self.assertEqual(compute.call_count, 1)
+        bump_org_version(7)
+        get_or_set_org(7, 'employees', 1, compute=compute)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_namespace_ttls(self):
+        set_org(7, 'employees', 1, value='page')
+        set_org(7, 'reports', 1, value='report')
+        set_org(7, 'reports', 2, value='short', ttl=5)
+        self.assertEqual(self.ttl(org_key(7, 'employees', 1)), TTLS['employees'])
+        # Namespaces without a TTLS entry use the cache's TIMEOUT
+        self.assertEqual(self.ttl(org_key(7, 'reports', 1)), 60)
+        self.assertEqual(self.ttl(org_key(7, 'reports', 2)), 5)
+        # The version itself never expires
+        self.assertEqual(self.ttl(make_key('org-version', 7)), -1)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'cache-tests',
+}})
+class ProcessLocalOrgCacheTests(SimpleTestCase):
+    """A locmem cache cannot see other workers' bumps, so nothing is cached per organization."""
+
+    def test_values_are_computed_every_time(self):
+        compute = mock.Mock(return_value='page')
+        get_or_set_org(7, 'employees', 1, compute=compute)
+        get_or_set_org(7, 'employees', 1, compute=compute)
+        self.assertEqual(compute.call_count, 2)
+        set_org(7, 'employees', 2, value='page')
+        self.assertIsNone(get_org(7, 'employees', 2))
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'counter-tests',
+}})
+class ProcessLocalCounterTests(TestCase):
+    """Dashboard counters are not kept in a cache only one worker can see."""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = make_organization()
+        make_employees(self.organization, 2)
+
+    def test_counts_come_from_the_database(self):
+        self.assertEqual(counters.get_dashboard_stats(self.organization.pk)[counters.EMPLOYEE_COUNT], 2)
+        make_employees(self.organization, 1, start=2)
+        self.assertEqual(counters.get_dashboard_stats(self.organization.pk)[counters.EMPLOYEE_COUNT], 3)
+        self.assertIsNone(cache.get(counters._key(self.organization.pk, counters.EMPLOYEE_COUNT)))
+
+    def test_reconcile_refuses_to_run(self):
+        with self.assertRaisesMessage(CommandError, 'not shared'):
+            call_command('reconcile_dashboard_counters')
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'revocation-tests',
+}})
+class TokenRevocationTests(TestCase):
+    """Revocations must reach every worker, not only the one whose locmem cache saw them."""
+
+    def setUp(self):
+        self.organization = make_organization()
+        self.employee, = make_employees(self.organization, 1)
+
+    def test_logout_is_seen_without_the_cache(self):
+        access = issue_tokens(self.employee, EMPLOYEE).access_token
+        self.assertFalse(is_revoked(access))
+        revoke_token(access)
+        # Another worker has an empty cache of its own
+        cache.clear()
+        self.assertTrue(is_revoked(access))
+
+    def test_deactivation_revokes_earlier_tokens(self):
+        access = issue_tokens(self.employee, EMPLOYEE).access_token
+        self.employee.is_active = False
+        self.employee.save()
+        cache.clear()
+        self.assertTrue(is_revoked(access))
+
+    def test_lookups_are_cached(self):
+        access = issue_tokens(self.employee, EMPLOYEE).access_token
+        with command_log.capture() as commands:
+            self.assertFalse(is_revoked(access))
+            self.assertFalse(is_revoked(access))
+        self.assertEqual(len(reads(commands)), 1)
+
+    def test_evicted_revocation_is_read_from_the_collection(self):
+        access = issue_tokens(self.employee, EMPLOYEE).access_token
+        revoke_token(access)
+        self.assertTrue(is_revoked(access))
+        # A shared cache may cull or evict the entry; the collection still has it
+        cache.delete(make_key('jwt', 'revoked', access['jti']))
+        self.assertTrue(is_revoked(access))
+
+    def test_tokens_without_a_role_are_refused(self):
+        access = issue_tokens(self.employee, EMPLOYEE).access_token
+        del access['role']
+        with self.assertRaises(InvalidToken):
+            ClaimsJWTAuthentication().get_user(access)
+
+
+class PublicQueriesTests(TestCase):
+    """get_public_queries lists only public queries, in both pagination modes."""
+
+    def setUp(self):
+        cache.clear()
+        organization = make_organization()
+        self.public = [
+            Query.objects.create(subject=f'Public {number}', description='-', organization=organization,
+                                 visibility='public')
+            for number in range(5)
+        ]
+        Query.objects.create(subject='Private', description='-', organization=organization)
+        self.client = APIClient()
+        self.url = reverse('get_public_queries')
+
+    def test_offset_pages(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 5)
+        self.assertEqual(len(response.json()['queries']), 2)
+
+    def test_cursor_pages_cover_every_public_query(self):
+        seen, cursor = [], None
+        while True:
+            params = {'pagination': 'cursor', 'page_size': 2, 'include_total': 1}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data['total'], 5)
+            seen += [query['id'] for query in data['queries']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [query.pk for query in reversed(self.public)])
+
+    def test_tampered_cursors_are_bad_requests(self):
+        for values in (['not a date', 1], ['2026-03-02T09:00:00Z', 'x'], [{}, []], 'garbage', None):
+            cursor = 'not-base64!' if values is None else encode_cursor(values)
+            response = self.client.get(self.url, {'pagination': 'cursor', 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, values)
+
+
+class BulkImportTests(TestCase):
+    """Employee import: photo files of failed rows and the shared hashing pool."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.organization = make_organization()
+
+    def stored_photos(self):
+        return sorted(name for _, _, names in os.walk(self.media_root) for name in names)
+
+    def test_photos_of_rows_that_fail_to_insert_are_deleted(self):
+        csv_file = io.BytesIO(
+            b'name,email,password,unique_id\n'
+            b'Ann,ann@example.com,secret-1,A1\n'
+            b'Bob,bob@example.com,secret-2,B1\n'
+        )
+        photos = io.BytesIO()
+        with zipfile.ZipFile(photos, 'w') as archive:
+            archive.writestr('A1.png', b'ann')
+            archive.writestr('B1.png', b'bob')
+        photos.seek(0)
+
+        validate_rows = bulk_import.validate_rows
+
+        def validate_then_race(*args):
+            # Someone registers Bob's email between validation and the insert
+            result = validate_rows(*args)
+            EmployeeSignup.objects.create(organization=self.organization, unique_id='B2', name='Bob',
+                                          email='bob@example.com', rfid='race')
+            return result
+
+        with mock.patch.object(bulk_import, 'validate_rows', validate_then_race), \
+                mock.patch.object(bulk_import, 'image_worker'):
+            report = bulk_import.import_employees(self.organization, csv_file, photos)
+
+        self.assertEqual((report['created'], report['failed']), (1, 1))
+        ann = EmployeeSignup.objects.get(email='ann@example.com')
+        self.assertEqual(self.stored_photos(), [os.path.basename(ann.photo.name)])
+
+    def test_non_utf8_csv_is_a_bad_request(self):
+        csv_file = io.BytesIO('name,email,password,unique_id\nJosé,jose@example.com,secret-1,J1\n'.encode('latin-1'))
+        with self.assertRaisesMessage(bulk_import.BulkImportError, 'UTF-8'):
+            bulk_import.import_employees(self.organization, csv_file)
+
+    def test_hash_pool_is_reused(self):
+        self.addCleanup(bulk_import.hash_pool.shutdown)
+        pool = bulk_import.hash_pool.get(2)
+        self.assertIs(bulk_import.hash_pool.get(2), pool)
+        self.assertIsNot(bulk_import.hash_pool.get(3), pool)
+
+
+class BenchmarkSafetyTests(SimpleTestCase):
+    """benchmark_monthly_report must not seed the application database by accident."""
+
+    def test_refuses_the_default_alias(self):
+        with self.assertRaisesMessage(CommandError, 'application database'):
+            call_command('benchmark_monthly_report', '--database', 'default', '--sizes', '10')
+
+    def test_refuses_an_alias_of_the_same_database(self):
+        databases = dict(settings.DATABASES, copy=dict(settings.DATABASES['default']))
+        with self.settings(DATABASES=databases), self.assertRaisesMessage(CommandError, 'application database'):
+            call_command('benchmark_monthly_report', '--database', 'copy', '--sizes', '10')
+
+    def test_rejects_unknown_aliases(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown database alias'):
+            call_command('benchmark_monthly_report', '--database', 'nope', '--sizes', '10')
+
+
+@override_settings(ATTENDANCE_EMAIL_SEND_TIME='00:00')
+class DigestWorkerTests(TestCase):
+    """The digest worker survives failed runs and sends a digest it slept through."""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.addCleanup(release_digest_lock, self.today)
+        self.worker = DigestWorker(stdout=io.StringIO())
+        self.worker.unreleased = set()
+
+    def test_missed_digest_is_sent_on_startup(self):
+        self.assertEqual(self.worker.first_due_day(), self.today)
+        acquire_digest_lock(self.today)
+        self.assertEqual(self.worker.first_due_day(), self.today + timedelta(days=1))
+
+    def test_failed_run_is_retried_until_sent(self):
+        send = mock.patch(
+            'Home.management.commands.run_attendance_digest.send_attendance_digest',
+            side_effect=[RuntimeError('SMTP down'), 3],
+        )
+        with send as sender, mock.patch('Home.management.commands.run_attendance_digest.time.sleep') as sleep, \
+                self.assertLogs('Home.management.commands.run_attendance_digest', 'ERROR'):
+            self.worker.deliver(self.today)
+        self.assertEqual(sender.call_count, 2)
+        sleep.assert_called_once()
+        self.assertTrue(digest_claimed(self.today))
+        self.assertIn('Sent 3 attendance digest(s)', self.worker.stdout.getvalue())
+
+    def test_lock_errors_do_not_escape(self):
+        with mock.patch(
+            'Home.management.commands.run_attendance_digest.acquire_digest_lock', side_effect=RuntimeError('down'),
+        ), mock.patch('Home.management.commands.run_attendance_digest.time.sleep'), \
+                self.assertLogs('Home.management.commands.run_attendance_digest', 'ERROR') as logs:
+            self.worker.deliver(self.today - timedelta(days=1))
+        self.assertIn('Giving up', logs.output[-1])
+
+
+class TapQueueReplayTests(TestCase):
+    """Draining the RFID journal twice (a crash between the write and the delete) changes nothing."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.queue = TapQueue(os.path.join(directory, 'taps.sqlite3'))
+        self.organization = make_organization()
+        self.employee, = make_employees(self.organization, 1)
+
+    def drain_twice(self, *times):
+        for scanned_at in times:
+            self.queue._connection().execute(
+                'INSERT INTO taps (employee_id, card_uid, scanned_at) VALUES (?, ?, ?)',
+                (self.employee.pk, self.employee.rfid, scanned_at.isoformat()),
+            )
+        rows = self.queue._connection().execute('SELECT employee_id, card_uid, scanned_at FROM taps').fetchall()
+        self.queue.drain_once()
+        # The process died before DELETE FROM taps: the same rows are drained again
+        self.queue._connection().executemany(
+            'INSERT INTO taps (employee_id, card_uid, scanned_at) VALUES (?, ?, ?)', rows
+        )
+        self.queue.drain_once()
+        self.assertEqual(self.queue.depth(), 0)
+        return Attendance.objects.get(employee=self.employee)
+
+    def test_replayed_check_in_is_not_a_check_out(self):
+        check_in = datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc)
+        record = self.drain_twice(check_in)
+        self.assertEqual(record.check_in, check_in)
+        self.assertIsNone(record.check_out)
+
+    def test_replayed_check_out_keeps_its_time(self):
+        check_in = datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc)
+        check_out = datetime(2026, 3, 2, 17, tzinfo=dt_timezone.utc)
+        record = self.drain_twice(check_in, check_out)
+        self.assertEqual((record.check_in, record.check_out), (check_in, check_out))
+
+    def test_replay_command_leaves_fresh_claims_alone(self):
+        self.queue._connection().execute(
+            'INSERT INTO taps (employee_id, card_uid, scanned_at, claimed_at) VALUES (?, ?, ?, ?)',
+            (self.employee.pk, self.employee.rfid, datetime(2026, 3, 2, 9).isoformat(), time.time()),
+        )
+        with mock.patch('Home.management.commands.replay_rfid_queue.tap_queue', self.queue):
+            call_command('replay_rfid_queue', stdout=io.StringIO())
+        self.assertEqual(self.queue.depth(), 1)
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'rfid-index-tests',
+}})
+class ProcessLocalRFIDIndexTests(TestCase):
+    """With a per-process cache, another worker's card changes reach this index through the database."""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = make_organization()
+        self.first, self.second = make_employees(self.organization, 2)
+        self.index = RFIDIndex()
+        self.card = self.first.rfid
+        self.assertEqual(self.index.lookup(self.card).pk, self.first.pk)
+
+    def change_elsewhere(self, employee, **values):
+        # Written by another worker: no signal, no invalidation in this process's cache
+        get_collection(EmployeeSignup).update_one({'id': employee.pk}, {'$set': values})
+
+    def test_local_hit_is_rechecked(self):
+        with command_log.capture() as commands:
+            self.assertEqual(self.index.lookup(self.card).pk, self.first.pk)
+        self.assertEqual(len(reads(commands)), 1)
+        self.assertEqual(self.index.stats()['hits'], 1)
+
+    def test_reassigned_card(self):
+        self.change_elsewhere(self.first, rfid='retired')
+        self.change_elsewhere(self.second, rfid=self.card)
+        self.assertEqual(self.index.lookup(self.card).pk, self.second.pk)
+        self.assertEqual(self.index.lookup_many([self.card])[self.card].pk, self.second.pk)
+
+    def test_removed_employee(self):
+        get_collection(EmployeeSignup).delete_one({'id': self.first.pk})
+        self.assertIsNone(self.index.lookup(self.card))
+        self.assertEqual(self.index.lookup_many([self.card]), {})
+
+    def test_deactivated_employee(self):
+        self.change_elsewhere(self.first, is_active=False)
+        self.assertFalse(self.index.lookup(self.card).is_active)
+
+
+class DateLookupTests(TestCase):
+    """Year/month/day filters become date ranges on every model; what cannot is refused cleanly."""
+
+    def setUp(self):
+        self.organization = make_organization()
+        self.march = Query.objects.create(subject='March', description='-', organization=self.organization)
+        self.april = Query.objects.create(subject='April', description='-', organization=self.organization)
+        for query, month in ((self.march, 3), (self.april, 4)):
+            Query.objects.filter(pk=query.pk).update(created_at=datetime(2026, month, 15, 12, tzinfo=dt_timezone.utc))
+
+    def test_year_and_month_on_any_model(self):
+        march = Query.objects.filter(created_at__year=2026, created_at__month=3)
+        self.assertEqual([query.pk for query in march], [self.march.pk])
+        related = self.organization.query_set.filter(Q(created_at__year=2026) & Q(created_at__month=4))
+        self.assertEqual([query.pk for query in related], [self.april.pk])
+        self.assertEqual(EmployeeSignup.objects.filter(date_joined__year=1999, date_joined__month=1).count(), 0)
+
+    def test_month_alone_is_not_supported(self):
+        with self.assertRaises(NotSupportedError):
+            list(Query.objects.filter(created_at__month=3))
+        with self.assertRaises(NotSupportedError):
+            list(Query.objects.annotate(month=ExtractMonth('created_at')))
+
+    def test_operations_refuse_both_call_shapes(self):
+        operations = connection.ops
+        for call in (
+            lambda: operations.date_extract_sql('month', 'date'),
+            lambda: operations.date_extract_sql('month', 'date', ()),
+            lambda: operations.datetime_extract_sql('month', 'check_in', (), 'UTC'),
+            lambda: operations.date_trunc_sql('month', 'date'),
+            lambda: operations.datetime_trunc_sql('month', 'check_in', 'UTC'),
+            lambda: operations.datetime_trunc_sql('month', 'check_in', (), 'UTC'),
+        ):
+            with self.assertRaises(NotSupportedError):
+                call()
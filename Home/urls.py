@@ -9,12 +9,14 @@ from .views import (
     # Organization views
     organization_signup, 
     organization_login,
+    organization_logout,
     organization_dashboard,
     
     # Employee views
     employee_login,
     employee_dashboard,
     add_employee, 
+    bulk_import_employees,
     manage_employees, 
     remove_employee,
     mark_employee_attendance,
@@ -24,9 +26,16 @@ from .views import (
     get_public_queries,
     index,
     receive_rfid,
+    receive_rfid_batch,
+    rfid_index_stats,
+    rfid_queue_stats,
+    login_hash_stats,
+    db_translation_stats,
 
     # Attendance views
     get_monthly_attendance,
+    attendance_table,
+    export_attendance,
     get_server_time,
 )
 
@@ -34,16 +43,21 @@ from .views import (
 organization_patterns = [
     path('signup/', organization_signup, name='organization_signup'),
     path('login/', organization_login, name='organization_login'),
+    path('logout/', organization_logout, name='organization_logout'),
     path('dashboard/', organization_dashboard, name='organization_dashboard'),
 ]
 
 employee_patterns = [
     path('login/', employee_login, name='employee_login'),
+    path('logout/', organization_logout, name='employee_logout'),
     path('dashboard/', employee_dashboard, name='employee_dashboard'),
     path('add-employee/<str:company>/', add_employee, name='add_employee'),
+    path('import/', bulk_import_employees, name='bulk_import_employees'),
     path('manage/', manage_employees, name='manage_employees'),
     path('remove/<int:employee_id>/', remove_employee, name='remove_employee'),
     path("attendance/monthly/<int:year>/<int:month>/", get_monthly_attendance, name="get_monthly_attendance"),
+    path("attendance/table/", attendance_table, name="attendance_table"),
+    path("attendance/export/", export_attendance, name="export_attendance"),
     path("attendance/mark/<int:employee_id>/<str:status_>/", mark_employee_attendance, name="mark_employee_attendance"),
 ]
 
@@ -64,6 +78,11 @@ urlpatterns = [
     path('api/query/', include(query_patterns)),
     path('api/rfid/scan/', receive_rfid, name='receive_rfid'),
     re_path(r'^api/rfid/scan$', receive_rfid),
+    path('api/rfid/scan/batch/', receive_rfid_batch, name='receive_rfid_batch'),
+    path('api/rfid/index/stats/', rfid_index_stats, name='rfid_index_stats'),
+    path('api/rfid/queue/stats/', rfid_queue_stats, name='rfid_queue_stats'),
+    path('api/auth/hash/stats/', login_hash_stats, name='login_hash_stats'),
+    path('api/db/translation/stats/', db_translation_stats, name='db_translation_stats'),
     path("api/time/", get_server_time, name="get_server_time"),
     # Root index view
     path('', index, name='index'),
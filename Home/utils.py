@@ -1,11 +1,17 @@
-from pymongo import MongoClient
+from datetime import datetime, timezone as dt_timezone
+
 from cryptography.fernet import Fernet
+from django.db import models, router
+from django.utils import timezone
+
+from Backend import mongo
 
 # Example key generation (store this key securely and use the same for encryption/decryption)
 # key = Fernet.generate_key()
 
 def get_db_handle(db_name, host, port, username, password):
-    client = MongoClient(
+    # Shared, pooled client per distinct set of options (Backend/mongo.py); do not close it
+    client = mongo.get_client_for(
         host=host,
         port=int(port),
         username=username,
@@ -14,6 +20,38 @@ def get_db_handle(db_name, host, port, username, password):
     db_handle = client[db_name]
     return db_handle, client
 
+def get_database(using='default', read_preference=None):
+    """
+    Return the raw pymongo database for a database alias.
+    Uses the process-wide client djongo also runs on (Backend/mongo.py).
+    """
+    return mongo.get_database(using, read_preference)
+
+def get_collection(model, using=None):
+    """Return the raw pymongo collection behind a djongo model (on `using`, or where the router sends writes)."""
+    return get_database(using or router.db_for_write(model))[model._meta.db_table]
+
+def model_from_document(model, document, field_names=None):
+    """
+    Build a model instance from a raw collection document, converting djongo's
+    storage types back (naive UTC datetimes -> aware, midnight datetimes -> dates).
+    With `field_names` only those fields are set and the rest are deferred, as with .only().
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field_names is None or field.attname in field_names or field.name in field_names
+    ]
+    values = []
+    for field in fields:
+        value = document.get(field.attname)
+        if isinstance(value, datetime):
+            if isinstance(field, models.DateTimeField):
+                value = timezone.make_aware(value, dt_timezone.utc)
+            elif isinstance(field, models.DateField):
+                value = value.date()
+        values.append(value)
+    return model.from_db(router.db_for_read(model), [field.attname for field in fields], values)
+
 def decrypt_employee_id(encrypted_id, key):
     """
     Decrypts the given encrypted employee id using Fernet symmetric encryption.
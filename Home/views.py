@@ -1,18 +1,18 @@
 import logging
 import traceback
-from datetime import datetime, time as dt_time, timedelta, date
-import threading
+from datetime import datetime, timedelta, date, timezone as dt_timezone
+import csv
+import itertools
 import json
 from django.shortcuts import render
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.files.images import get_image_dimensions
 from django.utils import timezone
-from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
-from django.http import JsonResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core.cache import cache
 from rest_framework.decorators import (
     api_view, permission_classes, parser_classes, throttle_classes
 )
@@ -21,71 +21,43 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from calendar import monthrange
-from pymongo import MongoClient
-from .models import Organization, EmployeeSignup, Query, Attendance
-from .serializers import OrganizationSerializer, EmployeeSerializer, ContactQuerySerializer, AttendanceSerializer
+from Backend.db_operations import translation_cache
+from .models import Organization, EmployeeSignup, Query, Attendance, mongo_date
+from .serializers import (
+    OrganizationSerializer, EmployeeSerializer, EmployeeListSerializer, ContactQuerySerializer, AttendanceSerializer
+)
+from .authentication import EMPLOYEE, ORGANIZATION, IsOrganization, issue_tokens, revoke_token
+from .hashers import hash_password
+from .image_worker import image_worker, inspect_image
+from .images import image_url
+from .login import HashingBusy, authenticate_employee, authenticate_organization, hashing_gate
+from .bulk_import import BulkImportError, import_employees
+from .cache import get_or_set_org, make_key
+from .counters import ATTENDANCE_TODAY, EMPLOYEE_COUNT, QUERY_COUNT, get_dashboard_stats
+from .pagination import keyset_page
+from . import repository
+from .rfid_index import rfid_index
+from .tap_queue import tap_queue
+from .utils import get_collection
 import calendar
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Global variables for attendance tracking
-attendance_records = []
-attendance_lock = threading.Lock()
+# Upper bound on taps accepted by one batch upload from a door controller
+RFID_BATCH_MAX_SCANS = 1000
 
-# Time configuration for email notifications
-EMAIL_SEND_TIME = dt_time(16, 39)  # 4:39 PM
+# Longest date range served by the attendance table endpoint
+ATTENDANCE_TABLE_MAX_DAYS = 366
 
-def send_attendance_email():
-    """Background thread function to send attendance emails."""
-    while True:
-        try:
-            current_time = timezone.localtime().time()
-            
-            # Check if it's time to send emails
-            if (current_time.hour == EMAIL_SEND_TIME.hour and 
-                current_time.minute == EMAIL_SEND_TIME.minute):
-                
-                # Process attendance records
-                with attendance_lock:
-                    records_to_process = attendance_records.copy()
-                    attendance_records.clear()
-                
-                # Send emails for each record
-                for record in records_to_process:
-                    try:
-                        subject = f"Attendance Confirmation - {record['name']}"
-                        message = (
-                            f"Employee: {record['name']}\n"
-                            f"ID: {record['employee_id']}\n"
-                            f"Time: {record['timestamp']}\n"
-                            f"Date: {timezone.localtime().strftime('%Y-%m-%d')}"
-                        )
-                        
-                        send_mail(
-                            subject=subject,
-                            message=message,
-                            from_email=settings.EMAIL_HOST_USER,
-                            recipient_list=[record['organization_email']],
-                            fail_silently=False,
-                        )
-                        logger.info(f"✉️ Sent attendance email for {record['name']}")
-                    except Exception as e:
-                        logger.error(f"⚠️ Failed to send email for {record['name']}: {str(e)}")
-            
-            # Sleep for 60 seconds before next check
-            import time
-            time.sleep(60)
-            
-        except Exception as e:
-            logger.error(f"⚠️ Email thread error: {str(e)}")
-            time.sleep(60)  # Wait before retrying
-
-# Start email thread if email settings are configured
-if hasattr(settings, 'EMAIL_HOST_USER') and settings.EMAIL_HOST_USER:
-    threading.Thread(target=send_attendance_email, daemon=True).start()
-    logger.info("📧 Started attendance email notification thread")
+# Attendance export: documents fetched per cursor batch, and the column order
+EXPORT_BATCH_SIZE = 1000
+
+# Seconds the public query total is cached in cursor-pagination mode
+PUBLIC_QUERY_COUNT_TTL = 60
+EXPORT_FIELDS = ["employee_unique_id", "employee_name", "date", "check_in", "check_out", "status"]
 
 @csrf_exempt
 @api_view(["POST"])
@@ -106,14 +78,33 @@ def receive_rfid(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         print("Card_UID==>", card_uid)
         
-        # Find the employee using the model's helper
-        employee = EmployeeSignup.find_by_rfid(card_uid)
+        # Find the employee through the in-memory RFID index (falls back to the DB on a miss)
+        employee = rfid_index.lookup(card_uid)
         if not employee:
             return Response({
                 "status": "error",
                 "message": "Invalid card"
             }, status=status.HTTP_404_NOT_FOUND)
         
+        # Write-behind mode: journal the tap and let the queue worker store it
+        if settings.RFID_WRITE_BEHIND:
+            scanned_at = timezone.now()
+            tap_queue.enqueue(employee.pk, card_uid, scanned_at)
+            return Response({
+                "status": "success",
+                "message": "Employee found and attendance queued",
+                "employee": {
+                    "id": employee.id,
+                    "name": employee.name,
+                    "email": employee.email,
+                    "rfid": employee.rfid,
+                    "attendance": {
+                        "queued": True,
+                        "scanned_at": scanned_at,
+                    }
+                }
+            }, status=status.HTTP_202_ACCEPTED)
+
         # Record attendance for the employee
         attendance, created = Attendance.mark_attendance(employee, status='P')
 
@@ -151,6 +142,117 @@ def receive_rfid(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@csrf_exempt
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser])
+def receive_rfid_batch(request):
+    """
+    Ingest taps buffered by an offline door controller.
+    Body: a JSON array (or {"scans": [...]}) of {"card_uid": ..., "scanned_at": ISO-8601}.
+    All cards are resolved in one query and attendance is written as one bulk upsert.
+    """
+    try:
+        data = request.data
+        scans = data.get("scans") if isinstance(data, dict) else data
+        if not isinstance(scans, list) or not scans:
+            return Response({
+                "status": "error",
+                "message": "A non-empty list of scans is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > RFID_BATCH_MAX_SCANS:
+            return Response({
+                "status": "error",
+                "message": f"At most {RFID_BATCH_MAX_SCANS} scans are accepted per batch"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        parsed = []
+        for position, scan in enumerate(scans):
+            scan = scan if isinstance(scan, dict) else {}
+            card_uid = str(scan.get("card_uid") or "").lower().strip()
+            raw_time = scan.get("scanned_at")
+            scanned_at = parse_datetime(str(raw_time)) if raw_time else timezone.now()
+            results.append({"index": position, "card_uid": card_uid})
+            if not card_uid or scanned_at is None:
+                results[position].update({"status": "error", "message": "card_uid and a valid scanned_at are required"})
+                continue
+            if timezone.is_naive(scanned_at):
+                scanned_at = timezone.make_aware(scanned_at)
+            # Same day boundaries as the live endpoint, which stamps taps with timezone.now()
+            scanned_at = scanned_at.astimezone(dt_timezone.utc)
+            parsed.append((position, card_uid, scanned_at))
+
+        employees = rfid_index.lookup_many(card_uid for _, card_uid, _ in parsed)
+
+        taps = []
+        tap_positions = []
+        for position, card_uid, scanned_at in parsed:
+            employee = employees.get(card_uid)
+            if employee is None:
+                results[position].update({"status": "error", "message": "Invalid card"})
+                continue
+            taps.append((employee, scanned_at))
+            tap_positions.append(position)
+
+        created_flags = Attendance.bulk_mark_attendance(taps, status='P')
+
+        for (employee, scanned_at), position, created in zip(taps, tap_positions, created_flags):
+            results[position].update({
+                "status": "success",
+                "event": "check_in" if created else "check_out",
+                "scanned_at": scanned_at,
+                "employee": {
+                    "id": employee.id,
+                    "name": employee.name,
+                },
+            })
+
+        return Response({
+            "status": "success",
+            "message": "Batch processed",
+            "accepted": len(taps),
+            "rejected": len(scans) - len(taps),
+            "results": results
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception(f"⚠️ RFID batch processing error: {str(e)}")
+        return Response({
+            "status": "error",
+            "message": "System error",
+            "debug_info": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def rfid_index_stats(request):
+    """Return hit/miss counters for this process's RFID lookup index."""
+    return Response(rfid_index.stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def rfid_queue_stats(request):
+    """Return the depth of the RFID write-behind queue and this worker's drain counters."""
+    return Response(tap_queue.stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def login_hash_stats(request):
+    """Return this process's login hashing concurrency and latency metrics."""
+    return Response(hashing_gate.stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def db_translation_stats(request):
+    """Return this process's djongo SQL translation cache metrics."""
+    return Response(translation_cache.stats(), status=status.HTTP_200_OK)
+
+
 # Render index page
 def index(request):
     return render(request, "index.html")
@@ -159,17 +261,17 @@ def index(request):
 # Utility Functions
 # ---------------------------
 def validate_image(image_file):
+    # Header checks only; the full decode and the variants run in the image worker
     if not image_file:
         return None
     if image_file.size > 5 * 1024 * 1024:
         return "Image size must be under 5MB"
-    width, height = get_image_dimensions(image_file)
-    if width > 2000 or height > 2000:
-        return "Image dimensions must be 2000x2000 pixels or smaller"
     allowed_types = ['image/jpeg', 'image/png', 'image/gif']
     if image_file.content_type not in allowed_types:
         return "Image must be JPEG, PNG, or GIF format"
-    return None
+    error = inspect_image(image_file)
+    image_file.seek(0)
+    return error
 
 def validate_credentials(data):
     email = data.get('email')
@@ -209,9 +311,12 @@ def organization_signup(request):
         organization = Organization.objects.create(
             name=data.get('name'),
             email=data.get('email'),
-            password=make_password(data.get('password')),
-            logo=logo
+            password=hash_password(data.get('password'), 'organization'),
+            logo=logo,
+            logo_status='pending' if logo else 'ready'
         )
+        if organization.logo:
+            image_worker.submit(organization)
 
         return Response({
             'message': 'Organization registered successfully',
@@ -237,12 +342,12 @@ def organization_login(request):
         if not data.get('email') or not data.get('password'):
             return Response({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        org = authenticate(request, email=data.get('email'), password=data.get('password'))
+        org = authenticate_organization(request, data.get('email'), data.get('password'))
         if org is None:
             return Response({'error': 'Invalid email or password'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(org)
+        # Generate JWT tokens (with the claims ClaimsJWTAuthentication reads)
+        refresh = issue_tokens(org, ORGANIZATION)
         return Response({
             'message': 'Login successful',
             'organization': {
@@ -254,6 +359,9 @@ def organization_login(request):
             'refresh': str(refresh)
         }, status=status.HTTP_200_OK)
 
+    except HashingBusy:
+        return Response({'error': 'Too many logins in progress. Please retry shortly.'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
     except Exception:
         logger.error(f"Organization login error: {traceback.format_exc()}")
         return Response({'error': 'Login failed. Please try again.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -263,18 +371,13 @@ def organization_login(request):
 # Organization Dashboard (JWT Protected)
 # ---------------------------
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganization])
 def organization_dashboard(request):
     try:
         org = request.user
         
-        # Get organization data and counts
-        query_count = Query.objects.filter(organization=org).count()
-        employee_count = EmployeeSignup.objects.filter(organization=org).count()
-        attendance_today = Attendance.objects.filter(
-            employee__organization=org,
-            date=timezone.now().date()
-        ).count()
+        # Counters are kept in the cache and updated in place (see Home/counters.py)
+        stats = get_dashboard_stats(org.pk)
 
         # Include complete organization data
         return Response({
@@ -282,12 +385,12 @@ def organization_dashboard(request):
                 'id': org.id,
                 'name': org.name,
                 'email': org.email,
-                'logo': request.build_absolute_uri(org.logo.url) if org.logo else None,
+                'logo': image_url(org.logo, org.logo_status, request),
             },
             'stats': {
-                'query_count': query_count,
-                'employee_count': employee_count,
-                'attendance_today': attendance_today
+                'query_count': stats[QUERY_COUNT],
+                'employee_count': stats[EMPLOYEE_COUNT],
+                'attendance_today': stats[ATTENDANCE_TODAY]
             }
         })
     except Exception as e:
@@ -296,17 +399,22 @@ def organization_dashboard(request):
 
 
 # ---------------------------
-# (Optional) JWT Logout - Typically handled client-side by deleting tokens
+# JWT Logout - revokes the tokens until they expire
 # ---------------------------
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def organization_logout(request):
     """
-    In a JWT-based system, logout is usually handled on the client side
-    by simply deleting the stored tokens. You can also implement token
-    blacklisting if needed.
+    Revoke the access token used for this request and, when it is posted as
+    `refresh`, the refresh token. Works for organization and employee tokens.
     """
-    return Response({'message': 'Logout successful (client-side token deletion required)'}, status=status.HTTP_200_OK)
+    revoke_token(request.auth)
+    if request.data.get('refresh'):
+        try:
+            revoke_token(RefreshToken(request.data['refresh']))
+        except TokenError:
+            return Response({'error': 'Invalid refresh token'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -323,20 +431,23 @@ def employee_login(request):
             return Response({'error': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Authenticate employee using the email and password.
-        employee = authenticate(request, email=data.get('email'), password=data.get('password'))
+        employee = authenticate_employee(request, data.get('email'), data.get('password'))
         if employee is None:
             return Response({'error': 'Invalid email or password'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(employee)
+        # Generate JWT tokens (with the claims ClaimsJWTAuthentication reads)
+        refresh = issue_tokens(employee, EMPLOYEE)
         
         return Response({
             'message': 'Login successful',
-            'employee': EmployeeSerializer(employee).data,
+            'employee': EmployeeListSerializer(employee).data,
             'access': str(refresh.access_token),
             'refresh': str(refresh)
         }, status=status.HTTP_200_OK)
     
+    except HashingBusy:
+        return Response({'error': 'Too many logins in progress. Please retry shortly.'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
     except Exception:
         logger.error(f"Employee login error: {traceback.format_exc()}")
         return Response({'error': 'Login failed. Please try again.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -348,18 +459,18 @@ def employee_dashboard(request):
         user = request.user
 
         # Determine if the authenticated user is an EmployeeSignup or an Organization.
-        if hasattr(user, 'organization'):
+        if user.is_employee:
             # If user is an EmployeeSignup, then 'organization' is available and user has date_joined.
             org = user.organization
             employee_data = {
                 'name': user.name,
                 'email': user.email,
-                'photo': request.build_absolute_uri(user.photo.url) if user.photo else None,
+                'photo': image_url(user.photo, user.photo_status, request),
                 'date_joined': user.date_joined,
             }
         else:
             # Otherwise, user is an Organization. We assume that the Organization object is acting as the user.
-            org = user
+            org = user.instance
             employee_data = {
                 'name': user.name,
                 'email': user.email,
@@ -368,7 +479,7 @@ def employee_dashboard(request):
             }
 
         total_queries = Query.objects.filter(owner=org).count()
-        org_logo_url = request.build_absolute_uri(org.logo.url) if org.logo else None
+        org_logo_url = image_url(org.logo, org.logo_status, request)
 
         return Response({
             'message': f'Welcome {user.email} to Employee Dashboard',
@@ -398,64 +509,216 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
+def parse_date_range(params):
+    """
+    Read a date range from query params: `start`/`end` (YYYY-MM-DD), or `year`
+    with an optional `month`. Missing values default to the current month.
+    Raises ValueError for malformed or reversed ranges.
+    """
+    if params.get('year'):
+        year = int(params['year'])
+        if params.get('month'):
+            month = int(params['month'])
+            return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+        return date(year, 1, 1), date(year, 12, 31)
+
+    today = timezone.localdate()
+    start_date = parse_date(params.get('start', '')) or today.replace(day=1)
+    end_date = parse_date(params.get('end', '')) or today.replace(
+        day=monthrange(today.year, today.month)[1]
+    )
+    if end_date < start_date:
+        raise ValueError('end must not be before start')
+    return start_date, end_date
+
+
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganization])
 def get_monthly_attendance(request, year, month):
-    employees = EmployeeSignup.objects.filter(organization=request.user)
+    # One query for the organization's employees, reused as the serializer's name map.
+    # Both reads are native pymongo queries (Home/repository.py).
+    employees = {
+        row['id']: (row['unique_id'], row['name'])
+        for row in repository.employee_rows(request.user.pk)
+    }
     year_int = int(year)
     month_int = int(month)
     _, days_in_month = monthrange(year_int, month_int)
     start_date_obj = date(year_int, month_int, 1)
     end_date_obj = date(year_int, month_int, days_in_month)
 
-    attendance_records = Attendance.objects.filter(
-        employee__in=employees,
-        date__range=[start_date_obj, end_date_obj]
-    )
-    serializer = AttendanceSerializer(attendance_records, many=True)
+    attendance_records = repository.attendance_range(employees, start_date_obj, end_date_obj)
+    serializer = AttendanceSerializer(attendance_records, many=True, context={'employees': employees})
     # print("Attendance Records==>", serializer.data)
     return Response(serializer.data)
 
 
 
-def get_attendance_table(start_date, end_date):
+def get_attendance_table(start_date, end_date, organization=None):
+    """
+    Generates an employee x day attendance grid for a date range.
+    One query loads the employees and one range query loads their Attendance rows,
+    which are pivoted in memory into grid[employee_index][day_offset].
+    A day shows the check-in time when the employee was present, otherwise the status label,
+    and 'A' when no record exists.
+    """
+    employees_qs = EmployeeSignup.objects.all()
+    if organization is not None:
+        employees_qs = employees_qs.filter(organization=organization)
+    employees = list(employees_qs.order_by('name').values('id', 'unique_id', 'name'))
+
+    total_days = (end_date - start_date).days + 1
+    dates = [start_date + timedelta(days=i) for i in range(total_days)]
+    grid = [['A'] * total_days for _ in employees]  # Default to Absent if no record exists
+    row_of = {employee['id']: row for row, employee in enumerate(employees)}
+
+    status_labels = dict(Attendance._meta.get_field('status').choices)
+    records = Attendance.objects.filter(
+        employee_id__in=list(row_of),
+        date__range=[start_date, end_date]
+    ).values_list('employee_id', 'date', 'status', 'check_in')
+
+    for employee_id, day, status_code, check_in in records:
+        row = row_of.get(employee_id)
+        offset = (day - start_date).days
+        if row is None or not 0 <= offset < total_days:
+            continue
+        # If status is 'Present' and check_in is set, show check_in time; otherwise, show the status label.
+        grid[row][offset] = (timezone.localtime(check_in).strftime('%H:%M:%S')
+                             if status_code == 'P' and check_in
+                             else status_labels.get(status_code, status_code))
+
+    return {
+        'dates': dates,
+        'employees': employees,
+        'grid': grid,
+    }
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsOrganization])
+def attendance_table(request):
     """
-    Generates an attendance table for a given date range using DailyAttendance.
-    The table is a dictionary with employee names as keys and lists of attendance values as values.
+    Employee x day attendance grid for the authenticated organization.
+    Query params: start/end or year[/month] as in parse_date_range; defaults to the current month.
     """
-    # Ensure start_date and end_date are date objects.
-    employees = EmployeeSignup.objects.all()
-    total_days = (end_date - start_date).days + 1
-    date_range = [start_date + timedelta(days=i) for i in range(total_days)]
-    attendance_table = {}
-    
-    for employee in employees:
-        attendance_table[employee.name] = []
-        for day in date_range:
-            attendance = DailyAttendance.objects.filter(employee=employee, date=day).first()
-            if attendance:
-                # If status is 'Present' and check_in is set, show check_in time; otherwise, show the status label.
-                value = (attendance.check_in.strftime('%H:%M:%S')
-                         if attendance.status == 'P' and attendance.check_in
-                         else attendance.get_status_display())
-                attendance_table[employee.name].append(value)
-            else:
-                attendance_table[employee.name].append('A')  # Default to Absent if no record exists
+    try:
+        start_date, end_date = parse_date_range(request.GET)
+        if (end_date - start_date).days >= ATTENDANCE_TABLE_MAX_DAYS:
+            return Response({'error': f'Date range is limited to {ATTENDANCE_TABLE_MAX_DAYS} days'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-    return attendance_table
+        table = get_attendance_table(start_date, end_date, organization=request.user.pk)
+        return Response({
+            'start': start_date,
+            'end': end_date,
+            'dates': table['dates'],
+            'employees': [
+                {
+                    'id': employee['id'],
+                    'unique_id': employee['unique_id'],
+                    'name': employee['name'],
+                    'days': row,
+                }
+                for employee, row in zip(table['employees'], table['grid'])
+            ],
+        }, status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception:
+        logger.error(f"Attendance table error: {traceback.format_exc()}")
+        return Response({'error': 'Failed to build attendance table. Please try again.'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class _EchoBuffer:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
 
 
+def _format_export_time(value):
+    # Raw documents hold naive UTC datetimes; match AttendanceSerializer's local HH:MM:SS
+    if not value:
+        return None
+    return timezone.localtime(timezone.make_aware(value, dt_timezone.utc)).strftime('%H:%M:%S')
+
+
+def iter_attendance_export(employees, start_date, end_date):
+    """
+    Yield export rows straight from a server-side Mongo cursor, `EXPORT_BATCH_SIZE`
+    documents at a time. `employees` maps employee id -> (unique_id, name).
+    """
+    cursor = get_collection(Attendance).find(
+        {
+            'employee_id': {'$in': list(employees)},
+            'date': {'$gte': mongo_date(start_date), '$lte': mongo_date(end_date)},
+        },
+        {'_id': 0, 'employee_id': 1, 'employee_unique_id': 1, 'date': 1,
+         'check_in': 1, 'check_out': 1, 'status': 1},
+    ).sort([('employee_id', 1), ('date', 1)]).batch_size(EXPORT_BATCH_SIZE)
+
+    try:
+        for doc in cursor:
+            unique_id, name = employees.get(doc['employee_id'], (None, None))
+            yield {
+                'employee_unique_id': doc.get('employee_unique_id') or unique_id,
+                'employee_name': name,
+                'date': doc['date'].strftime('%Y-%m-%d'),
+                'check_in': _format_export_time(doc.get('check_in')),
+                'check_out': _format_export_time(doc.get('check_out')),
+                'status': doc.get('status'),
+            }
+    finally:
+        cursor.close()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsOrganization])
+def export_attendance(request):
+    """
+    Stream the organization's attendance as CSV (default) or NDJSON.
+    Query params: output=csv|ndjson, plus start/end or year[/month] as in parse_date_range.
+    Rows are read from a batched Mongo cursor, so memory stays flat for any range.
+    """
+    output = request.GET.get('output', 'csv')
+    if output not in ('csv', 'ndjson'):
+        return Response({'error': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        start_date, end_date = parse_date_range(request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    employees = {
+        employee_id: (unique_id, name)
+        for employee_id, unique_id, name in EmployeeSignup.objects.filter(
+            organization_id=request.user.pk
+        ).values_list('id', 'unique_id', 'name')
+    }
+    rows = iter_attendance_export(employees, start_date, end_date)
+
+    if output == 'csv':
+        writer = csv.DictWriter(_EchoBuffer(), fieldnames=EXPORT_FIELDS)
+        content = itertools.chain([writer.writeheader()], (writer.writerow(row) for row in rows))
+        content_type = 'text/csv'
+    else:
+        content = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+        content_type = 'application/x-ndjson'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="attendance-{start_date:%Y%m%d}-{end_date:%Y%m%d}.{output}"'
+    )
+    return response
 
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganization])
 @parser_classes([MultiPartParser, FormParser])
 def add_employee(request, company):
     """Add new employee with custom ID and optional RFID."""
     try:
-        # Get the authenticated organization
+        # Get the authenticated organization (the name check below uses the token claim)
         organization = request.user
 
         # Validate organization name matches
@@ -514,13 +777,16 @@ def add_employee(request, company):
         employee = EmployeeSignup.objects.create(
             name=request.data['name'],
             email=request.data['email'],
-            password=make_password(request.data['password']),
+            password=hash_password(request.data['password'], 'employee'),
             unique_id=request.data['unique_id'],
             rfid=rfid,
-            organization=organization,
+            organization_id=organization.pk,
             photo=request.FILES['photo'],
+            photo_status='pending',
             is_active=True
         )
+        # Validation and variants happen after the response (see Home/image_worker.py)
+        image_worker.submit(employee)
 
         return Response({
             'status': 'success',
@@ -531,7 +797,9 @@ def add_employee(request, company):
                 'email': employee.email,
                 'unique_id': employee.unique_id,
                 'rfid': employee.rfid,
-                'photo_url': request.build_absolute_uri(employee.photo.url)
+                # Served once the image worker has accepted the upload (see photo_variants)
+                'photo_url': image_url(employee.photo, employee.photo_status, request),
+                'photo_status': employee.photo_status
             }
         }, status=status.HTTP_201_CREATED)
 
@@ -544,12 +812,53 @@ def add_employee(request, company):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsOrganization])
+@parser_classes([MultiPartParser, FormParser])
+def bulk_import_employees(request):
+    """
+    Import employees for the authenticated organization from a CSV upload (`file`)
+    and an optional ZIP of photos (`photos`). ?dry_run=1 only validates.
+    Returns counts, per-line errors and throughput (see Home/bulk_import.py).
+    """
+    try:
+        csv_file = request.FILES.get('file')
+        if not csv_file:
+            return Response({
+                'status': 'error',
+                'message': 'A CSV file is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_employees(
+            request.user.instance, csv_file,
+            photos_file=request.FILES.get('photos'),
+            dry_run=request.GET.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        )
+        return Response({
+            'status': 'success' if not report['failed'] else 'partial',
+            'message': f"{report['created']} employee(s) imported, {report['failed']} row(s) failed",
+            'data': report
+        }, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
+    except BulkImportError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception:
+        logger.error(f"Bulk employee import error: {traceback.format_exc()}")
+        return Response({
+            'status': 'error',
+            'message': 'Failed to import employees'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganization])
 def remove_employee(request, employee_id):
     try:
         try:
-            employee = EmployeeSignup.objects.get(id=employee_id, organization=request.user)
+            employee = EmployeeSignup.objects.get(id=employee_id, organization_id=request.user.pk)
         except EmployeeSignup.DoesNotExist:
             return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -560,12 +869,43 @@ def remove_employee(request, employee_id):
         return Response({'error': 'Failed to remove employee. Please try again.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def uses_cursor_pagination(request):
+    return 'cursor' in request.GET or request.GET.get('pagination') == 'cursor'
+
+
+def wants_total(request):
+    return request.GET.get('include_total', '').lower() in ('1', 'true', 'yes')
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_public_queries(request):
+    """
+    List public queries, newest first.
+    Offset mode: ?page=&page_size=. Cursor mode (?pagination=cursor or ?cursor=...):
+    keyset pages on (created_at, id) with an opaque next_cursor; ?include_total=1
+    adds a cached total count.
+    """
     try:
-        page = int(request.GET.get('page', 1))
         page_size = min(int(request.GET.get('page_size', 10)), 50)
+        if uses_cursor_pagination(request):
+            public_queries = Query.objects.filter(visibility='public')
+            queries, next_cursor = keyset_page(
+                public_queries, [('created_at', True), ('id', True)],
+                cursor=request.GET.get('cursor'), page_size=page_size
+            )
+            data = {
+                'queries': ContactQuerySerializer(queries, many=True).data,
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+            }
+            if wants_total(request):
+                data['total'] = cache.get_or_set(
+                    make_key('queries', 'public', 'count'), public_queries.count, PUBLIC_QUERY_COUNT_TTL
+                )
+            return Response(data, status=status.HTTP_200_OK)
+
+        page = int(request.GET.get('page', 1))
         start = (page - 1) * page_size
         end = start + page_size
         
@@ -579,40 +919,73 @@ def get_public_queries(request):
             'page_size': page_size,
             'total_pages': (total_queries + page_size - 1) // page_size
         }, status=status.HTTP_200_OK)
+    except ValueError as e:
+        # Malformed page, page_size or cursor
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception:
         logger.error(f"Get public queries error: {traceback.format_exc()}")
         return Response({'error': 'Failed to fetch queries. Please try again.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganization])
 def manage_employees(request):
     """
     Fetch a paginated list of employees belonging to the authenticated organization.
     This endpoint works with JWT since request.user is set when a valid JWT is provided.
+    Offset mode: ?page=&page_size=. Cursor mode (?pagination=cursor or ?cursor=...):
+    keyset pages on (name, id) with an opaque next_cursor; ?include_total=1 adds a cached count.
     """
     try:
         # Get pagination parameters
-        page = int(request.GET.get('page', 1))
         page_size = min(int(request.GET.get('page_size', 10)), 50)
-        start = (page - 1) * page_size
-        end = start + page_size
 
-        # Filter employees that belong to the organization (request.user)
-        employees_qs = EmployeeSignup.objects.filter(organization=request.user).order_by('name')
-        total_employees = employees_qs.count()
-        employees = employees_qs[start:end]
+        # Sparse fieldset (?fields=id,name,...); only those columns are loaded
+        fields = EmployeeListSerializer.requested_fields(request.GET.get('fields'))
+        org_employees = EmployeeSignup.objects.filter(organization_id=request.user.pk)
+        projected = org_employees.only(*EmployeeListSerializer.model_fields(fields) | {'id', 'name'})
+
+        if uses_cursor_pagination(request):
+            employees, next_cursor = keyset_page(
+                projected, [('name', False), ('id', False)],
+                cursor=request.GET.get('cursor'), page_size=page_size
+            )
+            data = {
+                'employees': EmployeeListSerializer(employees, many=True, fields=fields).data,
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+            }
+            if wants_total(request):
+                data['total'] = get_or_set_org(request.user.pk, 'employees', 'count', compute=org_employees.count)
+            return Response(data, status=status.HTTP_200_OK)
+
+        page = int(request.GET.get('page', 1))
+        start = (page - 1) * page_size
 
-        # Serialize the data
-        serialized_employees = EmployeeSerializer(employees, many=True).data
+        def build_page():
+            # Employees that belong to the organization (request.user), read natively
+            total_employees = repository.count_employees(request.user.pk)
+            employees = repository.employee_page(
+                request.user.pk, EmployeeListSerializer.model_fields(fields), skip=start, limit=page_size
+            )
+
+            # Serialize the data
+            serialized_employees = EmployeeListSerializer(employees, many=True, fields=fields).data
+
+            return {
+                'employees': serialized_employees,
+                'total': total_employees,
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_employees + page_size - 1) // page_size
+            }
 
-        return Response({
-            'employees': serialized_employees,
-            'total': total_employees,
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (total_employees + page_size - 1) // page_size
-        }, status=status.HTTP_200_OK)
+        # Pages are cached per organization version; any employee change bumps the version
+        data = get_or_set_org(request.user.pk, 'employees', page, page_size, ','.join(fields), compute=build_page)
+        return Response(data, status=status.HTTP_200_OK)
+    except ValueError as e:
+        # Malformed page, page_size or cursor
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception:
         logger.error(f"Manage employees error: {traceback.format_exc()}")
         return Response({'error': 'Failed to fetch employees. Please try again.'},
@@ -679,8 +1052,8 @@ def mark_employee_attendance(request, employee_id, status_):
         
         from .models import EmployeeSignup, Attendance
         
-        # Fetch the employee by ID
-        employee = EmployeeSignup.objects.get(id=employee_id)
+        # Fetch the employee by ID (with the organization, which mark_attendance copies)
+        employee = EmployeeSignup.objects.select_related('organization').get(id=employee_id)
         
         # Mark attendance using the helper method on Attendance model.
         # (Ensure your Attendance.mark_attendance method supports the "H" status.)
@@ -1,9 +1,19 @@
-from pymongo import MongoClient
+import os
+import sys
+
+import django
+
+# Run from anywhere: use the project's settings and its shared MongoClient
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
+django.setup()
+
+from Backend.mongo import close_all, get_database  # noqa: E402
+
 
 def get_all_rfids():
     # Connect to MongoDB
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client['minor_project_db']
+    db = get_database()
     
     # Query all employees with RFID cards
     rfid_data = db.Home_employeesignup.find(
@@ -16,7 +26,7 @@ def get_all_rfids():
     for record in rfid_data:
         print(f"Name: {record['name']:<20} RFID: {record['rfid']}")
     
-    client.close()
+    close_all()
 
 if __name__ == "__main__":
-    get_all_rfids()
\ No newline at end of file
+    get_all_rfids()